@@ -8,12 +8,29 @@ Flask API that automatically:
 5. Provides search API
 """
 
+import os
+
+# Let BLAS/OpenMP use every core; must be set before numpy is first imported
+os.environ.setdefault('OMP_NUM_THREADS', str(os.cpu_count() or 1))
+
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
 from werkzeug.utils import secure_filename
-import os
+import atexit
+import gc
+import shutil
 import tempfile
+import time
+import hashlib
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
 from neo4j import GraphDatabase
+from neo4j.exceptions import TransientError
+from cachetools import TTLCache
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -23,17 +40,20 @@ load_dotenv()
 from backend.etl import (
     load_and_parse_standard_data,
     export_neo4j_csvs,
-    safe_str,
-    split_authors,
     split_keywords,
-    parse_keyword_field,
-    make_stable_id
+    make_stable_ids,
+    explode_semicolon_column
 )
 from backend.search import (
     create_documents_and_metadata,
     create_vector_store,
     HybridSearchEngine
 )
+from backend.similarity import (
+    top_similar_pairs,
+    save_embedding_snapshot,
+    load_embedding_snapshot
+)
 
 app = Flask(__name__)
 
@@ -50,6 +70,13 @@ if not NEO4J_PASS:
     raise ValueError("NEO4J_PASS environment variable is required. Set it in .env file.")
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
 
+# Shared Neo4j driver: a thread-safe connection pool reused by the import
+# and the search engine instead of reconnecting on every upload
+NEO4J_DRIVER = GraphDatabase.driver(
+    NEO4J_URL, auth=(NEO4J_USER, NEO4J_PASS), max_connection_pool_size=50
+)
+atexit.register(NEO4J_DRIVER.close)
+
 # Enable CORS for frontend (restrict to specific origin in production)
 CORS(app, origins=[FRONTEND_URL])
 
@@ -60,167 +87,567 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
 # Global search engine (initialized after upload)
 search_engine = None
 current_db_path = None  # Track current database path
+current_papers = None  # DataFrame of every paper in the current corpus
+
+# Search result cache (cache-aside in front of hybrid_answer)
+SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', '1024'))
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', '300'))  # seconds
+search_cache = TTLCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+search_cache_lock = threading.Lock()
+# Bumped on every clear: a search only stores its response if no clear
+# happened while it ran (it may have used the pre-upload corpus)
+search_cache_generation = 0
+
+
+# Embeddings/titles for /api/semantic-similarities, keyed by db path
+_emb_cache = {'db_path': None, 'E': None, 'ids': None, 'titles': None}
+_emb_cache_lock = threading.Lock()
+
+
+def clear_embedding_cache():
+    """Forget the cached embedding matrix (call whenever the corpus changes)."""
+    with _emb_cache_lock:
+        _emb_cache.update(db_path=None, E=None, ids=None, titles=None)
+
+
+def write_embedding_snapshot(collection, db_path):
+    """Read the corpus embeddings from Chroma once and persist them to db_path."""
+    all_data = collection.get(include=["embeddings", "metadatas"])
+    if not all_data or not all_data['ids']:
+        return
+    titles = [meta.get('title', '') for meta in all_data['metadatas']]
+    save_embedding_snapshot(db_path, all_data['ids'], titles, np.stack(all_data['embeddings']))
+
+
+def _search_cache_key(query):
+    return hashlib.blake2b(query.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def clear_search_cache():
+    """Drop all cached search responses (call whenever the corpus changes)."""
+    global search_cache_generation
+    with search_cache_lock:
+        search_cache.clear()
+        search_cache_generation += 1
+
+
+NEO4J_BATCH_SIZE = 10000  # Rows per UNWIND statement
+NEO4J_COMMIT_EVERY = 20000  # Rows per explicit transaction commit
+NEO4J_WRITE_WORKERS = int(os.getenv('NEO4J_WRITE_WORKERS', '8'))  # Parallel sessions per phase
+NEO4J_REL_BATCH_SIZE = 1000  # Rows per relationship transaction (short lock hold times)
+NEO4J_MAX_RETRIES = 5  # Attempts per batch on transient errors (e.g. DeadlockDetected)
+
+# Paper properties written to Neo4j (missing columns default to "")
+PAPER_COLUMNS = ["title", "abstract", "date", "journal_name", "url", "citations"]
+
+
+def _chunks(rows, size=NEO4J_BATCH_SIZE):
+    """Yield successive fixed-size slices of a list of row dicts."""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _explode_semicolon_list(df, column):
+    """
+    Fan a semicolon-separated column out into a flat (paper_id, name) edge
+    table (see explode_semicolon_column). Returns an empty table if the
+    column is missing.
+    """
+    if column not in df.columns:
+        return pd.DataFrame(columns=["paper_id", "name"])
+    return explode_semicolon_column(df["doi"], df[column]).rename(columns={"key": "paper_id"})
+
+
+def _explode_edges(df, column, parser):
+    """
+    Fan a multi-valued column out into a flat (paper_id, name) edge table.
+    Returns an empty table if the column is missing.
+    """
+    if column not in df.columns:
+        return pd.DataFrame(columns=["paper_id", "name"])
+    edges = pd.DataFrame({
+        "paper_id": df["doi"],
+        "name": df[column].map(parser),
+    }).explode("name")
+    return edges[edges["name"].notna() & (edges["name"] != "")]
+
+
+def prepare_import_frame(df):
+    """
+    Strip DOIs once, drop rows without one and keep a single row per DOI,
+    so the import phases work on a smaller, clean frame.
+    """
+    df = df.assign(doi=df["doi"].fillna("").astype(str).str.strip())
+    return df[df["doi"] != ""].drop_duplicates("doi")
+
+
+def build_import_rows(df):
+    """
+    Turn the prepared DataFrame (see prepare_import_frame) into flat row
+    lists for the UNWIND queries.
+    Returns (paper_rows, author_rows, keyword_rows, legacy_rows).
+    """
+    # Papers
+    papers = df.reindex(columns=PAPER_COLUMNS, fill_value="")
+    papers.insert(0, "paper_id", df["doi"])
+    papers["doi"] = df["doi"]
+
+    # Authors -> AUTHORED edges
+    authors = _explode_semicolon_list(df, "authors")
+    authors = authors.assign(author_id=make_stable_ids("AUTHOR", authors["name"]))
+
+    # Author keywords and keywords plus / index keywords
+    keywords = pd.concat([
+        _explode_semicolon_list(df, kw_col).assign(type=kw_type)
+        for kw_col, kw_type in (("author_keywords", "author"), ("keywords_plus", "index"))
+    ], ignore_index=True)
+    keywords = keywords.assign(keyword_id=make_stable_ids("KEYWORD", keywords["name"]))
+
+    # Legacy 'sources' field (for backward compatibility)
+    legacy = _explode_edges(df, "sources", split_keywords)
+    legacy = legacy.assign(keyword_id=make_stable_ids("KEYWORD", legacy["name"]))
+
+    return (
+        papers.to_dict("records"),
+        authors.to_dict("records"),
+        keywords.to_dict("records"),
+        legacy.to_dict("records"),
+    )
+
+
+PAPERS_QUERY = """
+    UNWIND $rows AS row
+    MERGE (p:Paper {paper_id: row.paper_id})
+    SET p.title = row.title,
+        p.abstract = row.abstract,
+        p.date = row.date,
+        p.journal_name = row.journal_name,
+        p.doi = row.doi,
+        p.url = row.url,
+        p.citations = row.citations
+"""
+
+# Author/Keyword nodes are merged first in one serial pass (rows deduplicated
+# by id), so the parallel relationship writers below only MATCH them and
+# never race to MERGE the same node
+AUTHOR_NODES_QUERY = """
+    UNWIND $rows AS row
+    MERGE (a:Author {author_id: row.author_id})
+    SET a.name = row.name, a.name_lc = toLower(row.name)
+"""
+
+AUTHORED_QUERY = """
+    UNWIND $rows AS row
+    MATCH (p:Paper {paper_id: row.paper_id})
+    MATCH (a:Author {author_id: row.author_id})
+    MERGE (a)-[:AUTHORED]->(p)
+"""
+
+# author_keywords / keywords_plus carry a type on both node and relationship
+TYPED_KEYWORD_NODES_QUERY = """
+    UNWIND $rows AS row
+    MERGE (k:Keyword {keyword_id: row.keyword_id})
+    SET k.name = row.name, k.type = row.type
+"""
+
+TYPED_HAS_KEYWORD_QUERY = """
+    UNWIND $rows AS row
+    MATCH (p:Paper {paper_id: row.paper_id})
+    MATCH (k:Keyword {keyword_id: row.keyword_id})
+    MERGE (p)-[:HAS_KEYWORD {type: row.type}]->(k)
+"""
+
+# Legacy 'sources' keywords (backward compatibility) are untyped
+LEGACY_KEYWORD_NODES_QUERY = """
+    UNWIND $rows AS row
+    MERGE (k:Keyword {keyword_id: row.keyword_id})
+    SET k.name = row.name
+"""
+
+LEGACY_HAS_KEYWORD_QUERY = """
+    UNWIND $rows AS row
+    MATCH (p:Paper {paper_id: row.paper_id})
+    MATCH (k:Keyword {keyword_id: row.keyword_id})
+    MERGE (p)-[:HAS_KEYWORD]->(k)
+"""
+
+
+def _unique_rows(rows, key):
+    """One row per rows[key] (the last one wins, as with sequential SETs)."""
+    return list({row[key]: row for row in rows}.values())
+
+
+def _write_batches(session, query, rows):
+    """
+    Run an UNWIND query over rows in NEO4J_BATCH_SIZE chunks inside one
+    explicit transaction per phase, committing every NEO4J_COMMIT_EVERY rows.
+    """
+    tx = session.begin_transaction()
+    try:
+        pending = 0
+        for batch in _chunks(rows):
+            tx.run(query, rows=batch).consume()
+            pending += len(batch)
+            if pending >= NEO4J_COMMIT_EVERY:
+                tx.commit()
+                tx = session.begin_transaction()
+                pending = 0
+        tx.commit()
+    finally:
+        if not tx.closed():
+            tx.rollback()
+
+
+def _write_batch(session, query, batch):
+    """
+    Run one UNWIND batch as its own auto-commit transaction, retrying
+    transient errors such as Neo.TransientError.Transaction.DeadlockDetected.
+    Re-running a batch is safe because every write is a MERGE.
+    """
+    for attempt in range(NEO4J_MAX_RETRIES):
+        try:
+            session.run(query, rows=batch).consume()
+            return
+        except TransientError as e:
+            if attempt == NEO4J_MAX_RETRIES - 1:
+                raise
+            print(f"[WARN] Transient Neo4j error, retrying ({attempt + 1}/{NEO4J_MAX_RETRIES}): {e.code}")
+            time.sleep(0.5 * (attempt + 1))
+
+
+def _write_shard(driver, query, rows, batch_size=NEO4J_REL_BATCH_SIZE):
+    """
+    Write one shard in its own session, one short transaction per batch, so
+    locks are held briefly and a deadlock only re-runs the batch that hit it.
+    """
+    with driver.session() as session:
+        for batch in _chunks(rows, batch_size):
+            _write_batch(session, query, batch)
 
 
-def auto_import_to_neo4j(df):
+def _write_parallel(driver, query, rows, key, workers=NEO4J_WRITE_WORKERS):
+    """
+    Shard rows by hash(row[key]) % workers and write the shards concurrently,
+    each through its own driver session. key is the author_id / keyword_id,
+    so each Author or Keyword node is written by a single session. The shards
+    are not lock-disjoint: creating a relationship also locks its Paper end,
+    and a paper's authors/keywords fall into different shards. That
+    contention is absorbed by the small per-batch transactions and retries
+    in _write_shard.
+    """
+    shards = [[] for _ in range(max(1, workers))]
+    for row in rows:
+        shards[hash(row[key]) % len(shards)].append(row)
+    shards = [shard for shard in shards if shard]
+    if not shards:
+        return
+
+    with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+        futures = [executor.submit(_write_shard, driver, query, shard) for shard in shards]
+        for future in futures:
+            future.result()
+
+
+NEO4J_CONSTRAINTS = {
+    "paper_id_unique": "CREATE CONSTRAINT paper_id_unique IF NOT EXISTS "
+                       "FOR (p:Paper) REQUIRE p.paper_id IS UNIQUE",
+    "author_id_unique": "CREATE CONSTRAINT author_id_unique IF NOT EXISTS "
+                        "FOR (a:Author) REQUIRE a.author_id IS UNIQUE",
+    "keyword_id_unique": "CREATE CONSTRAINT keyword_id_unique IF NOT EXISTS "
+                         "FOR (k:Keyword) REQUIRE k.keyword_id IS UNIQUE",
+}
+
+
+# TEXT index behind graph_search's author lookups (a.name_lc CONTAINS $name,
+# with name_lc = toLower(name) stored at import); a range index cannot
+# serve CONTAINS
+NEO4J_TEXT_INDEXES = {
+    "author_name_lc": "CREATE TEXT INDEX author_name_lc IF NOT EXISTS "
+                      "FOR (a:Author) ON (a.name_lc)",
+}
+
+
+def _ensure_schema(session):
+    """Create only the uniqueness constraints and TEXT indexes that do not exist yet."""
+    existing = {record["name"] for record in session.run("SHOW CONSTRAINTS YIELD name")}
+    for name, statement in NEO4J_CONSTRAINTS.items():
+        if name not in existing:
+            session.run(statement)
+
+    existing = {record["name"] for record in session.run("SHOW INDEXES YIELD name")}
+    for name, statement in NEO4J_TEXT_INDEXES.items():
+        if name not in existing:
+            session.run(statement)
+
+    # Authors merged before name_lc was stored
+    session.run("MATCH (a:Author) WHERE a.name_lc IS NULL SET a.name_lc = toLower(a.name)")
+
+
+def _import_authors(driver, author_rows, workers=NEO4J_WRITE_WORKERS):
+    """Author nodes (serial) + AUTHORED relationships (parallel)."""
+    print(f"[AUTHORS] Importing authors ({workers} workers)...")
+    _write_shard(driver, AUTHOR_NODES_QUERY, _unique_rows(author_rows, "author_id"), NEO4J_BATCH_SIZE)
+    _write_parallel(driver, AUTHORED_QUERY, author_rows, "author_id", workers)
+
+
+def _import_keywords(driver, keyword_rows, legacy_rows, workers=NEO4J_WRITE_WORKERS):
+    """Keyword nodes (serial) + HAS_KEYWORD relationships (parallel), typed then legacy."""
+    print(f"[KEYWORDS] Importing keywords ({workers} workers)...")
+    _write_shard(driver, TYPED_KEYWORD_NODES_QUERY, _unique_rows(keyword_rows, "keyword_id"), NEO4J_BATCH_SIZE)
+    _write_shard(driver, LEGACY_KEYWORD_NODES_QUERY, _unique_rows(legacy_rows, "keyword_id"), NEO4J_BATCH_SIZE)
+    _write_parallel(driver, TYPED_HAS_KEYWORD_QUERY, keyword_rows, "keyword_id", workers)
+    _write_parallel(driver, LEGACY_HAS_KEYWORD_QUERY, legacy_rows, "keyword_id", workers)
+
+
+def auto_import_to_neo4j(df, driver=None, replace=True):
     """
     Automatically import data to Neo4j using Python driver
     No manual CSV copying needed!
+
+    Rows are sent in batches through UNWIND queries, so each phase costs a
+    handful of round-trips instead of one per paper/author/keyword.
+    Uses the shared NEO4J_DRIVER unless another driver is passed in.
+    With replace=False the existing graph is kept and the rows are merged
+    into it (every write is a MERGE, so re-imported papers are idempotent).
     """
-    print("\n[CONNECT] Connecting to Neo4j...")
+    driver = driver or NEO4J_DRIVER
+    df = prepare_import_frame(df)
 
-    driver = GraphDatabase.driver(NEO4J_URL, auth=(NEO4J_USER, NEO4J_PASS))
+    with driver.session() as session:
+        # Uniqueness constraints back every MERGE, so they stay in place
+        print("[SCHEMA] Preparing constraints/indexes...")
+        _ensure_schema(session)
 
-    try:
-        with driver.session() as session:
+        if replace:
             # Clear existing data
             print("[CLEAN] Clearing old data...")
             session.run("MATCH (n) DETACH DELETE n")
 
-            # Create constraints
-            print("[SCHEMA] Creating constraints...")
-            session.run("""
-                CREATE CONSTRAINT paper_id_unique IF NOT EXISTS 
-                FOR (p:Paper) REQUIRE p.paper_id IS UNIQUE
-            """)
-            session.run("""
-                CREATE CONSTRAINT author_id_unique IF NOT EXISTS 
-                FOR (a:Author) REQUIRE a.author_id IS UNIQUE
-            """)
-            session.run("""
-                CREATE CONSTRAINT keyword_id_unique IF NOT EXISTS 
-                FOR (k:Keyword) REQUIRE k.keyword_id IS UNIQUE
-            """)
-
-            # Import Papers
-            print("[PAPERS] Importing papers...")
-            for _, row in df.iterrows():
-                doi = safe_str(row.get("doi", "")).strip()
-                if not doi:
-                    continue
-
-                session.run("""
-                    MERGE (p:Paper {paper_id: $paper_id})
-                    SET p.title = $title,
-                        p.abstract = $abstract,
-                        p.date = $date,
-                        p.journal_name = $journal_name,
-                        p.doi = $doi,
-                        p.url = $url,
-                        p.citations = $citations
-                """, {
-                    "paper_id": doi,
-                    "title": row["title"],
-                    "abstract": row["abstract"],
-                    "date": row["date"],
-                    "journal_name": row["journal_name"],
-                    "doi": doi,
-                    "url": row.get("url", ""),
-                    "citations": row.get("citations", "")
-                })
-
-            # Import Authors and Relationships
-            print("[AUTHORS] Importing authors...")
-            for _, row in df.iterrows():
-                doi = safe_str(row.get("doi", "")).strip()
-                if not doi:
-                    continue
-
-                for author_name in split_authors(row.get("authors", "")):
-                    author_id = make_stable_id("AUTHOR", author_name)
-
-                    # Create author
-                    session.run("""
-                        MERGE (a:Author {author_id: $author_id})
-                        SET a.name = $name
-                    """, {"author_id": author_id, "name": author_name})
-
-                    # Create relationship
-                    session.run("""
-                        MATCH (a:Author {author_id: $author_id})
-                        MATCH (p:Paper {paper_id: $paper_id})
-                        MERGE (a)-[:AUTHORED]->(p)
-                    """, {"author_id": author_id, "paper_id": doi})
-
-            # Import Keywords (author_keywords and keywords_plus)
-            print("[KEYWORDS] Importing keywords...")
-            for _, row in df.iterrows():
-                doi = safe_str(row.get("doi", "")).strip()
-                if not doi:
-                    continue
-
-                # Process author keywords
-                author_kw_raw = row.get("author_keywords", "")
-                if isinstance(author_kw_raw, str):
-                    author_keywords = parse_keyword_field(author_kw_raw)
-                elif isinstance(author_kw_raw, list):
-                    author_keywords = author_kw_raw
-                else:
-                    author_keywords = []
-
-                for kw in author_keywords:
-                    kw_id = make_stable_id("KEYWORD", kw)
-                    session.run("""
-                        MERGE (k:Keyword {keyword_id: $keyword_id})
-                        SET k.name = $name, k.type = 'author'
-                    """, {"keyword_id": kw_id, "name": kw})
-                    session.run("""
-                        MATCH (p:Paper {paper_id: $paper_id})
-                        MATCH (k:Keyword {keyword_id: $keyword_id})
-                        MERGE (p)-[:HAS_KEYWORD {type: 'author'}]->(k)
-                    """, {"paper_id": doi, "keyword_id": kw_id})
-
-                # Process keywords plus / index keywords
-                kw_plus_raw = row.get("keywords_plus", "")
-                if isinstance(kw_plus_raw, str):
-                    keywords_plus = parse_keyword_field(kw_plus_raw)
-                elif isinstance(kw_plus_raw, list):
-                    keywords_plus = kw_plus_raw
-                else:
-                    keywords_plus = []
-
-                for kw in keywords_plus:
-                    kw_id = make_stable_id("KEYWORD", kw)
-                    session.run("""
-                        MERGE (k:Keyword {keyword_id: $keyword_id})
-                        SET k.name = $name, k.type = 'index'
-                    """, {"keyword_id": kw_id, "name": kw})
-                    session.run("""
-                        MATCH (p:Paper {paper_id: $paper_id})
-                        MATCH (k:Keyword {keyword_id: $keyword_id})
-                        MERGE (p)-[:HAS_KEYWORD {type: 'index'}]->(k)
-                    """, {"paper_id": doi, "keyword_id": kw_id})
-
-                # Also process legacy 'sources' field if present (for backward compatibility)
-                if "sources" in df.columns:
-                    for kw in split_keywords(row.get("sources", "")):
-                        kw_id = make_stable_id("KEYWORD", kw)
-                        session.run("""
-                            MERGE (k:Keyword {keyword_id: $keyword_id})
-                            SET k.name = $name
-                        """, {"keyword_id": kw_id, "name": kw})
-                        session.run("""
-                            MATCH (p:Paper {paper_id: $paper_id})
-                            MATCH (k:Keyword {keyword_id: $keyword_id})
-                            MERGE (p)-[:HAS_KEYWORD]->(k)
-                        """, {"paper_id": doi, "keyword_id": kw_id})
-
-            # Verify import
-            result = session.run("MATCH (n) RETURN count(n) as count")
-            count = result.single()["count"]
-            print(f"[OK] Imported {count} nodes to Neo4j")
+        # Build flat edge tables (vectorized fan-out, no per-row loops)
+        paper_rows, author_rows, keyword_rows, legacy_rows = build_import_rows(df)
+
+        # Import Papers
+        print(f"[PAPERS] Importing {len(paper_rows)} papers...")
+        _write_batches(session, PAPERS_QUERY, paper_rows)
+
+        # Papers are committed, so the author and keyword phases can run
+        # side by side (the driver is thread-safe). They are not independent:
+        # both lock the Paper end of their relationships, so they split the
+        # write sessions between them rather than doubling the contention,
+        # and rely on the per-batch transactions/retries of _write_shard
+        workers = max(1, NEO4J_WRITE_WORKERS // 2)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            authors_job = executor.submit(_import_authors, driver, author_rows, workers)
+            keywords_job = executor.submit(_import_keywords, driver, keyword_rows, legacy_rows, workers)
+            authors_job.result()
+            keywords_job.result()
+
+        # Verify import
+        result = session.run("MATCH (n) RETURN count(n) as count")
+        count = result.single()["count"]
+        print(f"[OK] Imported {count} nodes to Neo4j")
+
 
+ALLOWED_EXTENSIONS = ('.xlsx', '.xls', '.csv')
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB reads for streamed uploads
+
+
+# Background upload jobs (one at a time: uploads rebuild shared state)
+upload_executor = ThreadPoolExecutor(max_workers=1)
+upload_jobs = {}  # job_id -> {'status', 'step', 'result', 'error'}
+upload_jobs_lock = threading.Lock()
+MAX_TRACKED_JOBS = 50
+
+
+def _update_job(job_id, **fields):
+    with upload_jobs_lock:
+        upload_jobs[job_id].update(fields)
+
+
+def _run_upload_job(job_id, filepath, replace=False):
+    """Executor target: run process_file, record the outcome on the job and delete the file."""
+    try:
+        payload, status_code = process_file(
+            filepath, progress=lambda step: _update_job(job_id, step=step), replace=replace
+        )
+        if status_code == 200:
+            _update_job(job_id, status='ready', step='Done', result=payload)
+        else:
+            _update_job(job_id, status='error', error=payload.get('error'))
+    except Exception as e:
+        print(f"[ERROR] {str(e)}")
+        _update_job(job_id, status='error', error=str(e))
     finally:
-        driver.close()
+        try:
+            os.remove(filepath)
+        except OSError:
+            pass
+
+
+def new_upload_job(filename):
+    """
+    New job id plus the job-unique path its upload is saved to, so a second
+    upload with the same name cannot overwrite a file still waiting in the queue.
+    """
+    job_id = uuid.uuid4().hex
+    return job_id, os.path.join(app.config['UPLOAD_FOLDER'], f"{job_id}_{filename}")
+
+
+def submit_upload_job(job_id, filepath, replace=False):
+    """Queue a file saved for job_id (see new_upload_job) for background processing."""
+    with upload_jobs_lock:
+        # Forget the oldest finished jobs once the table grows too large
+        finished = [jid for jid, job in upload_jobs.items() if job['status'] != 'processing']
+        for jid in finished[:max(0, len(upload_jobs) - MAX_TRACKED_JOBS + 1)]:
+            del upload_jobs[jid]
+        upload_jobs[job_id] = {'status': 'processing', 'step': 'Queued', 'result': None, 'error': None}
+    upload_executor.submit(_run_upload_job, job_id, filepath, replace)
+
+
+def process_file(filepath, progress=None, replace=False):
+    """
+    Run the full pipeline (ETL -> embeddings -> Neo4j -> search engine)
+    on a file that is already on disk. Returns (payload, status_code).
+    progress, if given, is called with a short description of each step.
+
+    If a corpus is already loaded, only papers whose DOI is not indexed yet
+    are embedded and merged into it; replace=True rebuilds everything.
+    """
+    global search_engine, current_db_path, current_papers
+    progress = progress or (lambda step: None)
+
+    # Step 1: ETL - Load and clean data
+    print("\n[STEP 1] Processing data...")
+    progress('Processing data')
+    df = load_and_parse_standard_data(filepath)
+
+    if df.empty:
+        return {'error': 'No valid papers found in file'}, 400
+
+    if not replace and search_engine is not None:
+        return add_papers(df, progress)
+
+    # Step 2: Create vector embeddings
+    # The new index is built under its own path while the current engine keeps
+    # serving searches; it is swapped in only once it is complete.
+    print("\n[STEP 2] Creating vector embeddings...")
+    progress('Creating vector embeddings')
+    new_db_path = f"{DB_PATH}_{time.time_ns()}"
+    contents, metadatas, ids = create_documents_and_metadata(df)
+    create_vector_store(contents, metadatas, ids, new_db_path, COLLECTION_NAME)
+
+    # Step 3: Auto-import to Neo4j
+    print("\n[STEP 3] Importing to Neo4j...")
+    progress('Importing to Neo4j')
+    auto_import_to_neo4j(df, NEO4J_DRIVER)
+
+    # Step 4: Initialize search engine
+    print("\n[STEP 4] Initializing search engine...")
+    progress('Initializing search engine')
+    new_engine = HybridSearchEngine(
+        db_path=new_db_path,
+        collection_name=COLLECTION_NAME,
+        neo4j_url=NEO4J_URL,
+        neo4j_user=NEO4J_USER,
+        neo4j_pass=NEO4J_PASS,
+        llm_model="llama3.2",
+        neo4j_driver=NEO4J_DRIVER
+    )
+
+    # Snapshot embeddings for /api/semantic-similarities
+    write_embedding_snapshot(new_engine.collection, new_db_path)
+
+    # Swap in the new index, then release and delete the old one
+    old_db_path = current_db_path
+    search_engine, current_db_path, current_papers = new_engine, new_db_path, df
+    clear_search_cache()
+    clear_embedding_cache()
+    gc.collect()
+    if old_db_path and os.path.exists(old_db_path):
+        try:
+            shutil.rmtree(old_db_path)
+        except Exception:
+            pass  # Ignore cleanup errors (e.g. files still locked on Windows)
+
+    # Convert DataFrame to list of dicts for frontend
+    papers_data = df.to_dict('records')
+
+    return {
+        'success': True,
+        'message': 'File processed successfully',
+        'papers_count': len(df),
+        'papers': papers_data,
+        'status': 'ready'
+    }, 200
+
+
+def add_papers(df, progress):
+    """
+    Incremental upload: embed only new papers into the loaded vector store
+    and merge the file into the existing graph. Returns (payload, status_code).
+    """
+    global current_papers
+
+    print("\n[STEP 2] Adding new vector embeddings...")
+    progress('Creating vector embeddings')
+    contents, metadatas, ids = create_documents_and_metadata(df)
+    added = search_engine.add_documents(contents, metadatas, ids)
+
+    try:
+        print("\n[STEP 3] Merging into Neo4j...")
+        progress('Importing to Neo4j')
+        auto_import_to_neo4j(df, NEO4J_DRIVER, replace=False)
+
+        # Snapshot embeddings for /api/semantic-similarities
+        write_embedding_snapshot(search_engine.collection, current_db_path)
+    finally:
+        # Cleared only once the graph and the snapshot are written: anything
+        # cached before then describes the old corpus (the db path does not
+        # change on an incremental add, so _emb_cache cannot tell)
+        clear_search_cache()
+        clear_embedding_cache()
+
+    # Already-indexed papers keep their existing entry
+    merged = pd.concat([current_papers, df], ignore_index=True).drop_duplicates("doi")
+    # Columns only one of the uploads had are NaN for the other's rows, which
+    # jsonify would emit as the invalid JSON token NaN
+    categorical = [c for c in merged.columns if isinstance(merged[c].dtype, pd.CategoricalDtype)]
+    current_papers = merged.astype({c: object for c in categorical}).fillna("")
+    papers_data = current_papers.to_dict('records')
+
+    return {
+        'success': True,
+        'message': f'Added {added} new papers',
+        'papers_count': len(current_papers),
+        'new_papers_count': added,
+        'papers': papers_data,
+        'status': 'ready'
+    }, 200
+
+
+def _replace_requested():
+    """True if the upload asked for a full rebuild (?replace=true)."""
+    return request.args.get('replace', '').lower() == 'true'
+
+
+@app.before_request
+def reject_oversized_requests():
+    """
+    Reject requests whose declared Content-Length exceeds MAX_CONTENT_LENGTH
+    before any of the body is read or parsed.
+    """
+    content_length = request.content_length
+    if content_length and content_length > app.config['MAX_CONTENT_LENGTH']:
+        return jsonify({'error': 'File too large (max 16MB)'}), 413
 
 
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     """
-    Handle file upload and automatic processing
+    Handle file upload. Processing runs as a background job; the response
+    is 202 with a job_id to poll via /api/status.
+    New papers are added to the current corpus; ?replace=true rebuilds it.
     """
-    global search_engine
-
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
 
@@ -229,73 +656,83 @@ def upload_file():
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
 
-    if not file.filename.endswith(('.xlsx', '.xls', '.csv')):
+    if not file.filename.endswith(ALLOWED_EXTENSIONS):
         return jsonify({'error': 'Invalid file type. Use Excel or CSV'}), 400
 
     try:
         # Save uploaded file
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        job_id, filepath = new_upload_job(secure_filename(file.filename))
         file.save(filepath)
 
-        # Step 1: ETL - Load and clean data
-        print("\n[STEP 1] Processing data...")
-        df = load_and_parse_standard_data(filepath)
-
-        if df.empty:
-            return jsonify({'error': 'No valid papers found in file'}), 400
-
-        # Step 2: Create vector embeddings
-        print("\n[STEP 2] Creating vector embeddings...")
-        global current_db_path
-        # Release old ChromaDB connection before creating new store
-        if search_engine is not None:
-            search_engine = None
-            import gc
-            gc.collect()
-        # Use unique database path to avoid locking issues
-        import time as time_module
-        new_db_path = f"{DB_PATH}_{int(time_module.time())}"
-        # Clean up old database if exists
-        if current_db_path and os.path.exists(current_db_path):
-            try:
-                import shutil
-                shutil.rmtree(current_db_path)
-            except Exception:
-                pass  # Ignore cleanup errors
-        current_db_path = new_db_path
-        contents, metadatas, ids = create_documents_and_metadata(df)
-        create_vector_store(contents, metadatas, ids, current_db_path, COLLECTION_NAME)
-
-        # Step 3: Auto-import to Neo4j
-        print("\n[STEP 3] Importing to Neo4j...")
-        auto_import_to_neo4j(df)
-
-        # Step 4: Initialize search engine
-        print("\n[STEP 4] Initializing search engine...")
-        search_engine = HybridSearchEngine(
-            db_path=current_db_path,
-            collection_name=COLLECTION_NAME,
-            neo4j_url=NEO4J_URL,
-            neo4j_user=NEO4J_USER,
-            neo4j_pass=NEO4J_PASS,
-            llm_model="llama3.2"
-        )
+        # Process in the background; poll /api/status?job_id=... for progress
+        submit_upload_job(job_id, filepath, replace=_replace_requested())
+        return jsonify({'job_id': job_id, 'status': 'processing'}), 202
+
+    except Exception as e:
+        print(f"[ERROR] {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
-        # Convert DataFrame to list of dicts for frontend
-        papers_data = df.to_dict('records')
 
-        return jsonify({
-            'success': True,
-            'message': 'File processed successfully',
-            'papers_count': len(df),
-            'papers': papers_data,
-            'status': 'ready'
-        })
+@app.route('/api/upload_stream', methods=['POST'])
+def upload_stream():
+    """
+    Handle a raw (non-multipart) upload streamed straight to disk.
+    The request body is the file itself; the name comes from ?filename=...
+    (?replace=true as for /api/upload).
+
+    Bypasses Werkzeug's multipart parser, so large files are copied in
+    1MB chunks instead of being parsed and buffered first.
+    """
+    filename = secure_filename(request.args.get('filename', ''))
+
+    if not filename:
+        return jsonify({'error': 'No filename provided'}), 400
 
+    if not filename.endswith(ALLOWED_EXTENSIONS):
+        return jsonify({'error': 'Invalid file type. Use Excel or CSV'}), 400
+
+    max_bytes = app.config['MAX_CONTENT_LENGTH']
+    job_id, filepath = new_upload_job(filename)
+
+    tmp_path = None
+    try:
+        # Write to a temp file in the upload folder, then move into place
+        written = 0
+        with tempfile.NamedTemporaryFile(dir=app.config['UPLOAD_FOLDER'], delete=False) as tmp:
+            tmp_path = tmp.name
+            while True:
+                chunk = request.stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    break
+                tmp.write(chunk)
+
+        if written > max_bytes:
+            return jsonify({'error': 'File too large (max 16MB)'}), 413
+        if written == 0:
+            return jsonify({'error': 'No file provided'}), 400
+
+        os.replace(tmp_path, filepath)
+        tmp_path = None
+
+        submit_upload_job(job_id, filepath, replace=_replace_requested())
+        return jsonify({'job_id': job_id, 'status': 'processing'}), 202
+
+    except HTTPException:
+        # e.g. Werkzeug's 413 for an oversized chunked body keeps its status
+        raise
     except Exception as e:
         print(f"[ERROR] {str(e)}")
         return jsonify({'error': str(e)}), 500
+    finally:
+        # Partial body left behind by a rejected or interrupted upload
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
 
 
 @app.route('/api/search', methods=['POST'])
@@ -314,6 +751,13 @@ def search():
     if not query:
         return jsonify({'error': 'Query cannot be empty'}), 400
 
+    cache_key = _search_cache_key(query)
+    with search_cache_lock:
+        cached = search_cache.get(cache_key)
+        generation = search_cache_generation
+    if cached is not None:
+        return jsonify(cached)
+
     try:
         # Perform hybrid search
         result = search_engine.hybrid_answer(query)
@@ -345,6 +789,14 @@ def search():
             'transparency': result.get('transparency', {})
         }
 
+        # A fallback answer (e.g. the LLM timed out) is not cached, so the
+        # next identical query tries again; neither is an answer from a
+        # corpus that an upload replaced while it ran
+        if not result.get('error'):
+            with search_cache_lock:
+                if search_cache_generation == generation:
+                    search_cache[cache_key] = response
+
         return jsonify(response)
 
     except Exception as e:
@@ -355,12 +807,25 @@ def search():
 @app.route('/api/status', methods=['GET'])
 def status():
     """
-    Check if system is ready
+    Check if system is ready.
+    With ?job_id=..., also report progress of that upload job; once the job
+    is ready its 'result' holds the same payload the upload used to return.
     """
-    return jsonify({
+    response = {
         'ready': search_engine is not None,
         'neo4j_url': NEO4J_URL
-    })
+    }
+
+    job_id = request.args.get('job_id')
+    if job_id:
+        with upload_jobs_lock:
+            job = upload_jobs.get(job_id)
+            job = dict(job) if job else None
+        if job is None:
+            return jsonify({'error': 'Unknown job_id'}), 404
+        response['job'] = job
+
+    return jsonify(response)
 
 
 @app.route('/api/health', methods=['GET'])
@@ -387,51 +852,37 @@ def get_semantic_similarities():
         threshold = data.get('threshold', 0.5)  # Minimum similarity to return
         max_per_paper = data.get('max_per_paper', 3)  # Max connections per paper
 
-        # Get all papers from the collection
-        collection = search_engine.collection
-        all_data = collection.get(include=["embeddings", "metadatas"])
-
-        if not all_data or not all_data['ids']:
-            return jsonify({'similarities': []})
-
-        ids = all_data['ids']
-        embeddings = all_data['embeddings']
-        metadatas = all_data['metadatas']
-
-        # Calculate pairwise cosine similarities
-        import numpy as np
-        embeddings_np = np.array(embeddings)
-
-        similarities = []
-        paper_counts = {}  # Track connections per paper
-
-        # Calculate all similarities first
-        all_pairs = []
-        for i in range(len(ids)):
-            for j in range(i + 1, len(ids)):
-                # Cosine similarity (embeddings are already normalized)
-                sim = float(np.dot(embeddings_np[i], embeddings_np[j]))
-                if sim >= threshold:
-                    all_pairs.append({
-                        'source_doi': ids[i],
-                        'target_doi': ids[j],
-                        'similarity': sim,
-                        'source_title': metadatas[i].get('title', ''),
-                        'target_title': metadatas[j].get('title', '')
-                    })
-
-        # Sort by similarity (highest first)
-        all_pairs.sort(key=lambda x: x['similarity'], reverse=True)
-
-        # Filter to max_per_paper connections
-        for pair in all_pairs:
-            source_count = paper_counts.get(pair['source_doi'], 0)
-            target_count = paper_counts.get(pair['target_doi'], 0)
-
-            if source_count < max_per_paper and target_count < max_per_paper:
-                similarities.append(pair)
-                paper_counts[pair['source_doi']] = source_count + 1
-                paper_counts[pair['target_doi']] = target_count + 1
+        # Load the memory-mapped embedding snapshot (cached until the next upload)
+        with _emb_cache_lock:
+            if _emb_cache['db_path'] != current_db_path:
+                snapshot = load_embedding_snapshot(current_db_path)
+                if snapshot is None:
+                    # No snapshot yet (e.g. older store) - build it from Chroma
+                    write_embedding_snapshot(search_engine.collection, current_db_path)
+                    snapshot = load_embedding_snapshot(current_db_path)
+                if snapshot is None:
+                    return jsonify({'similarities': []})
+                E, snapshot_ids, snapshot_titles = snapshot
+                _emb_cache.update(db_path=current_db_path, E=E, ids=snapshot_ids, titles=snapshot_titles)
+            ids = _emb_cache['ids']
+            embeddings_np = _emb_cache['E']
+            titles = _emb_cache['titles']
+
+        # Calculate pairwise cosine similarities (one matmul, capped per paper)
+        source_idx, target_idx, sims = top_similar_pairs(
+            embeddings_np, threshold, max_per_paper
+        )
+
+        similarities = [
+            {
+                'source_doi': ids[i],
+                'target_doi': ids[j],
+                'similarity': float(sim),
+                'source_title': titles[i],
+                'target_title': titles[j]
+            }
+            for i, j, sim in zip(source_idx.tolist(), target_idx.tolist(), sims.tolist())
+        ]
 
         return jsonify({
             'similarities': similarities,
@@ -5,4 +5,5 @@ Contains:
 - etl.py: Data processing and Neo4j export
 - search.py: Hybrid search engine (vector + graph)
 - ranking_service.py: Journal ranking lookups
+- similarity.py: Vectorized pairwise similarity between papers
 """
@@ -1,15 +1,60 @@
 # backend/etl.py
 import os
-import math
 import re
+import gzip
 import hashlib
-from typing import Optional, List, Tuple, Dict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, List, Dict, Iterator
+import numpy as np
 import pandas as pd
 
+# Try to import pyarrow for the multithreaded CSV parser, fall back to pandas' C engine
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    from pyarrow import csv as pa_csv
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Try to import python-calamine (Rust Excel reader), fall back to openpyxl/xlrd
+try:
+    import python_calamine  # noqa: F401
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
+# Bytes per parallel block for the pyarrow CSV reader
+CSV_BLOCK_SIZE = 1 << 20
+
+# gzip level for export_gzip: level 1 already shrinks the ID-heavy export
+# tables by an order of magnitude at a fraction of the CPU of higher levels
+CSV_GZIP_LEVEL = 1
+
+# Rows converted, cleaned and filtered at a time while loading, so only one
+# chunk's worth of intermediate pandas copies is alive at once
+LOAD_CHUNK_ROWS = 100_000
+
+# Pair rows generated and written at a time for SAME_YEAR_AS, whose size grows
+# with the square of the documents per year
+PAIR_BLOCK_ROWS = 1_000_000
+
+# Background threads writing export files while the next table is built
+# (pyarrow's conversion and CSV writer release the GIL)
+EXPORT_WRITE_WORKERS = min(4, os.cpu_count() or 1)
+
+# pandas read_excel engine (None lets pandas pick openpyxl/xlrd by extension)
+EXCEL_ENGINE = "calamine" if HAS_CALAMINE else None
+
 
 # ------------------------------------------------------------
 # Column normalization (robust against Excel quirks + quotes)
 # ------------------------------------------------------------
+_WS_RE = re.compile(r"\s+")
+
+
 def normalize_col(col: str) -> str:
     """
     Normalize column names to avoid hidden Excel characters:
@@ -21,8 +66,7 @@ def normalize_col(col: str) -> str:
     s = str(col)
     s = s.replace("\ufeff", "")
     s = s.replace("\xa0", " ")
-    s = s.strip()
-    s = " ".join(s.split())
+    s = _WS_RE.sub(" ", s).strip()
 
     # Remove wrapping quotes repeatedly (handles "'title'" and '"title"')
     while len(s) >= 2 and (
@@ -68,6 +112,9 @@ OPTIONAL_COLUMNS = {
     "keywords_plus",    # System/index keywords (WoS: Keywords Plus, Scopus: Index Keywords)
 }
 
+# Low-cardinality columns held as pandas categoricals once loading is done
+CATEGORY_COLUMNS = ("source", "vhbRanking", "abdcRanking", "journal_quartile", "journal_name")
+
 # Column aliases for raw WoS/Scopus exports (lowercase keys for case-insensitive matching)
 COLUMN_ALIASES = {
     # WoS format
@@ -98,9 +145,11 @@ COLUMN_ALIASES = {
 # Safe conversion (NaN / None → "")
 # ------------------------------------------------------------
 def safe_str(x):
-    if x is None:
-        return ""
-    if isinstance(x, float) and math.isnan(x):
+    # Strings (the common case after astype(str)) return without a str() call
+    if type(x) is str:
+        return x
+    # x != x is the NaN test without a math.isnan call
+    if x is None or (isinstance(x, float) and x != x):
         return ""
     return str(x)
 
@@ -120,64 +169,176 @@ def get_user_file_path() -> Optional[str]:
 # ------------------------------------------------------------
 # Load + Parse standardized dataset (ETL Stage 1)
 # ------------------------------------------------------------
-def load_and_parse_standard_data(file_path: str) -> pd.DataFrame:
-    print(f"\n[LOAD] Loading standardized file: {file_path}")
+@lru_cache(maxsize=1024)
+def canonical_col(col: str) -> str:
+    """
+    Normalized column name with WoS/Scopus aliases applied. Cached: each
+    header is resolved once when picking columns to parse and reused when
+    the loaded chunks are renamed.
+    """
+    name = normalize_col(col)
+    return COLUMN_ALIASES.get(name.lower(), name)
 
-    # Load file
-    if file_path.lower().endswith(".csv"):
-        df = pd.read_csv(file_path, encoding="utf-8", on_bad_lines="skip")
+
+def _iter_table_chunks(file_path: str) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV/Excel file as strings in chunks of LOAD_CHUNK_ROWS rows,
+    parsing only the columns that map onto the known schema (unknown export
+    columns are never materialized). Always yields at least one (possibly
+    empty) chunk, so the header is known even for an empty file.
+    """
+    known = set(REQUIRED_COLUMNS) | set(COLUMNS_WITH_DEFAULTS) | OPTIONAL_COLUMNS
+    is_csv = file_path.lower().endswith(".csv")
+
+    # Header only, to pick the columns worth parsing
+    if is_csv:
+        header = pd.read_csv(file_path, encoding="utf-8", nrows=0).columns
     else:
-        df = pd.read_excel(file_path)
-
-    # Normalize headers
-    df.columns = [normalize_col(c) for c in df.columns]
-
-    # Apply column aliases (for raw WoS/Scopus exports) - case insensitive
-    rename_map = {}
-    for c in df.columns:
-        c_lower = c.lower()
-        if c_lower in COLUMN_ALIASES:
-            rename_map[c] = COLUMN_ALIASES[c_lower]
-    df.rename(columns=rename_map, inplace=True)
-
-    # Handle duplicate columns (keep first occurrence)
-    df = df.loc[:, ~df.columns.duplicated()]
-
-    # Debug: show exact representations
-    print("[COLUMNS] Normalized columns:", [repr(c) for c in df.columns])
-
-    # Validate required columns
-    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
-    if missing:
-        raise ValueError(
-            f"[ERROR] Missing required columns: {missing}\n"
-            f"Found columns: {list(df.columns)}"
+        header = pd.read_excel(file_path, nrows=0, engine=EXCEL_ENGINE).columns
+    usecols = [c for c in header if canonical_col(c) in known]
+    if not usecols:
+        # Nothing recognizable - load everything so the error lists the columns
+        usecols = None
+
+    if is_csv and HAS_PYARROW:
+        # Parse with all cores into compact Arrow buffers, then convert to
+        # pandas objects one slice at a time
+        if usecols is not None:
+            table = _read_csv_arrow(file_path, list(usecols))
+        else:
+            table = _read_csv_arrow(file_path, list(header), select=False)
+        if table is not None:
+            for start in range(0, max(table.num_rows, 1), LOAD_CHUNK_ROWS):
+                yield table.slice(start, LOAD_CHUNK_ROWS).to_pandas()
+            return
+        print("[LOAD] Rows with missing trailing fields found, reading with pandas")
+
+    if is_csv:
+        empty = True
+        # No usecols= here: with it pandas truncates rows that have extra
+        # fields instead of skipping them, so select after parsing
+        for chunk in pd.read_csv(file_path, encoding="utf-8", on_bad_lines="skip",
+                                 dtype=str, chunksize=LOAD_CHUNK_ROWS):
+            empty = False
+            yield chunk if usecols is None else chunk[usecols]
+        if empty:
+            yield pd.DataFrame(columns=usecols if usecols is not None else header, dtype=str)
+        return
+
+    # Excel has no streaming reader; the workbook is one chunk
+    yield pd.read_excel(file_path, usecols=usecols, dtype=str, engine=EXCEL_ENGINE)
+
+
+def _read_csv_arrow(file_path: str, columns: List[str], select: bool = True) -> Optional["pa.Table"]:
+    """
+    Parse a CSV with pyarrow's block-parallel reader (all cores), reading
+    only the given columns, all typed as strings. Rows with too many fields
+    are skipped (as pandas' on_bad_lines="skip" does). Rows with too few
+    fields (e.g. exports that omit empty trailing columns) cannot be padded
+    by pyarrow, so None is returned and the caller falls back to pandas,
+    which keeps them with empty values. With select=False every column is read under pyarrow's own names; the
+    given names only set the string types (pandas-mangled duplicates such as
+    "a.1" match nothing and are ignored).
+    """
+    short_rows = []
+
+    def handle_invalid_row(row):
+        if row.actual_columns > row.expected_columns:
+            return "skip"
+        short_rows.append(row.number)
+        return "error"
+
+    try:
+        return pa_csv.read_csv(
+            file_path,
+            read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE, use_threads=True),
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True, invalid_row_handler=handle_invalid_row),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=columns if select else None,
+                column_types={c: pa.string() for c in columns},
+                strings_can_be_null=True,
+            ),
         )
+    except pa.ArrowInvalid:
+        if not short_rows:
+            raise
+        return None
+
+
+def _clean_chunk(chunk: pd.DataFrame, positions: List[int], names: List[str],
+                 selected_columns: List[str]) -> pd.DataFrame:
+    """
+    Rename/select one raw chunk according to the column plan made from the
+    header, fill defaults, clean values and apply the hard quality filter.
+    """
+    chunk = chunk.iloc[:, positions].set_axis(names, axis=1)
 
     # Add default values for missing columns
-    for col, default_val in COLUMNS_WITH_DEFAULTS.items():
-        if col not in df.columns:
-            df[col] = default_val
-            print(f"[DEFAULT] Added default column '{col}' = '{default_val}'")
-
-    # Keep only known columns (stable order)
-    all_known_columns = REQUIRED_COLUMNS + list(COLUMNS_WITH_DEFAULTS.keys())
-    selected_columns = all_known_columns + [c for c in OPTIONAL_COLUMNS if c in df.columns]
-    # Only select columns that exist
-    selected_columns = [c for c in selected_columns if c in df.columns]
-    df = df[selected_columns]
-
-    # Clean values
-    for col in df.columns:
-        df[col] = df[col].apply(safe_str)
+    chunk = chunk.assign(**{
+        col: default_val for col, default_val in COLUMNS_WITH_DEFAULTS.items()
+        if col not in chunk.columns
+    })[selected_columns]
+
+    # Clean values (NaN/None -> "", everything else -> str), whole chunk at once
+    chunk = chunk.fillna("").astype(str)
 
     # Hard quality filter (recommended for graph + embeddings)
-    before = len(df)
-    df = df[
-        (df["title"].str.strip() != "") &
-        (df["abstract"].str.strip() != "") &
-        (df["doi"].str.strip() != "")
-    ]
+    # (strip each key column once; the stripped values are kept)
+    title = chunk["title"].str.strip()
+    abstract = chunk["abstract"].str.strip()
+    doi = chunk["doi"].str.strip()
+    # Plain numpy mask/values: no index alignment on the slice or the assign
+    keep = ((title != "") & (abstract != "") & (doi != "")).to_numpy()
+    return chunk[keep].assign(
+        title=title.to_numpy()[keep],
+        abstract=abstract.to_numpy()[keep],
+        doi=doi.to_numpy()[keep],
+    )
+
+
+def load_and_parse_standard_data(file_path: str) -> pd.DataFrame:
+    print(f"\n[LOAD] Loading standardized file: {file_path}")
+
+    cleaned = []
+    before = 0
+    plan = None
+
+    # Load file chunk by chunk; the column plan is made from the first one
+    for chunk in _iter_table_chunks(file_path):
+        if plan is None:
+            # Normalize headers and apply column aliases (for raw WoS/Scopus
+            # exports, case insensitive) in a single pass
+            canonical = [canonical_col(c) for c in chunk.columns]
+
+            # Handle duplicate columns (keep first occurrence)
+            positions = [i for i, c in enumerate(canonical) if c not in canonical[:i]]
+            names = [canonical[i] for i in positions]
+
+            # Debug: show exact representations
+            print("[COLUMNS] Normalized columns:", [repr(c) for c in names])
+
+            # Validate required columns
+            missing = [c for c in REQUIRED_COLUMNS if c not in names]
+            if missing:
+                raise ValueError(
+                    f"[ERROR] Missing required columns: {missing}\n"
+                    f"Found columns: {names}"
+                )
+
+            for col, default_val in COLUMNS_WITH_DEFAULTS.items():
+                if col not in names:
+                    print(f"[DEFAULT] Added default column '{col}' = '{default_val}'")
+
+            # Keep only known columns (stable order)
+            all_known_columns = REQUIRED_COLUMNS + list(COLUMNS_WITH_DEFAULTS.keys())
+            # (optional columns in file order; iterating the set would vary per run)
+            selected_columns = all_known_columns + [c for c in names if c in OPTIONAL_COLUMNS]
+            plan = (positions, names, selected_columns)
+
+        before += len(chunk)
+        cleaned.append(_clean_chunk(chunk, *plan))
+
+    df = pd.concat(cleaned, ignore_index=True)
     after = len(df)
 
     print(f"[OK] Rows before filter: {before}")
@@ -186,6 +347,12 @@ def load_and_parse_standard_data(file_path: str) -> pd.DataFrame:
     # Apply journal rankings lookup
     df = apply_journal_rankings(df)
 
+    # Repeat-heavy columns as categories (integer codes + one copy of each
+    # string); done after the ranking writes, which may add new values
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
     return df
 
 
@@ -203,28 +370,29 @@ def apply_journal_rankings(df: pd.DataFrame) -> pd.DataFrame:
         return df
 
     print("\n[RANKING] Looking up journal rankings...")
-    vhb_found = 0
-    abdc_found = 0
-
-    for idx, row in df.iterrows():
-        journal = safe_str(row.get("journal_name", ""))
-        issn = safe_str(row.get("issn", ""))
-        eissn = safe_str(row.get("eissn", ""))
-
-        # Only look up if current value is N/A or empty
-        current_vhb = safe_str(row.get("vhbRanking", "")).strip()
-        if not current_vhb or current_vhb == "N/A":
-            vhb = ranking_service.get_vhb_ranking(journal, issn, eissn)
-            if vhb != "N/A":
-                df.at[idx, "vhbRanking"] = vhb
-                vhb_found += 1
-
-        current_abdc = safe_str(row.get("abdcRanking", "")).strip()
-        if not current_abdc or current_abdc == "N/A":
-            abdc = ranking_service.get_abdc_ranking(journal, issn, eissn)
-            if abdc != "N/A":
-                df.at[idx, "abdcRanking"] = abdc
-                abdc_found += 1
+
+    # Whole-column lookups instead of an iterrows() loop with .at writes
+    def column(name: str) -> pd.Series:
+        if name not in df.columns:
+            return pd.Series("", index=df.index, dtype=object)
+        return df[name].fillna("").astype(str)
+
+    journal = column("journal_name")
+    issn = column("issn")
+    eissn = column("eissn")
+
+    # Only look up if current value is N/A or empty
+    found = {}
+    for col, lookup in (("vhbRanking", ranking_service.get_vhb_rankings),
+                        ("abdcRanking", ranking_service.get_abdc_rankings)):
+        current = column(col).str.strip()
+        todo = (current == "") | (current == "N/A")
+        ranking = lookup(journal[todo], issn[todo], eissn[todo])
+        ranking = ranking[ranking != "N/A"]
+        df.loc[ranking.index, col] = ranking
+        found[col] = len(ranking)
+    vhb_found = found["vhbRanking"]
+    abdc_found = found["abdcRanking"]
 
     print(f"   Found VHB rankings: {vhb_found}/{len(df)}")
     print(f"   Found ABDC rankings: {abdc_found}/{len(df)}")
@@ -249,6 +417,32 @@ def make_stable_id(prefix: str, value: str) -> str:
     return f"{prefix}_{_sha1(v.lower())}"
 
 
+def make_stable_ids(prefix: str, values: pd.Series) -> pd.Series:
+    """
+    Vectorized make_stable_id: distinct values are normalized in one pandas
+    pass, each distinct normalized key (" J1 ", "j1" and "J1" share one) is
+    hashed once in a tight loop, and the IDs are mapped back onto the column.
+    """
+    uniques = values.unique()
+    keys = pd.Series(uniques, dtype=object).map(safe_str).str.strip().str.lower()
+    sha1 = hashlib.sha1
+    ids = {k: f"{prefix}_{sha1(k.encode('utf-8')).hexdigest()}" for k in keys.unique()}
+    return values.map(dict(zip(uniques, keys.map(ids))))
+
+
+def explode_semicolon_column(keys, values: pd.Series) -> pd.DataFrame:
+    """
+    Vectorized split_authors: split a semicolon-separated column, explode it
+    into one (key, name) row per entry and drop empty names.
+    """
+    edges = pd.DataFrame({
+        "key": keys,
+        "name": values.fillna("").astype(str).str.split(";").to_numpy(),
+    }).explode("name", ignore_index=True)
+    edges["name"] = edges["name"].str.strip()
+    return edges[edges["name"].notna() & (edges["name"] != "")]
+
+
 def split_authors(authors_raw: str) -> List[str]:
     """
     Based on your Scopus Example screenshots:
@@ -281,14 +475,13 @@ def split_keywords(raw: str) -> List[str]:
         # Fallback: comma-separated keywords (only as a last resort)
         parts = [p.strip() for p in s.split(",")]
 
-    # remove empties + de-duplicate while preserving order
-    seen = set()
-    out = []
+    # remove empties + de-duplicate (case-insensitive, first spelling wins)
+    # while preserving order; each token is lowercased and hashed once
+    unique: Dict[str, str] = {}
     for p in parts:
-        if p and p.lower() not in seen:
-            out.append(p)
-            seen.add(p.lower())
-    return out
+        if p:
+            unique.setdefault(p.lower(), p)
+    return list(unique.values())
 
 
 def parse_keyword_field(raw: str) -> List[str]:
@@ -308,6 +501,10 @@ def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
+# 4-digit year (19xx/20xx) anywhere in a date string
+_YEAR_RE = re.compile(r"(?:19|20)\d{2}")
+
+
 def extract_year(date_str: str) -> str:
     """
     Extract year from date string.
@@ -317,16 +514,176 @@ def extract_year(date_str: str) -> str:
     if not s:
         return ""
     # Try to find 4-digit year
-    match = re.search(r'(19|20)\d{2}', s)
+    match = _YEAR_RE.search(s)
     if match:
         return match.group(0)
     return ""
 
 
+# Columns read by export_neo4j_csvs
+EXPORT_COLUMNS = [
+    "doi", "title", "abstract", "url", "authors", "date",
+    "journal_name", "issn", "eissn", "vhbRanking", "abdcRanking",
+]
+
+
+def _null_empty(chunk: "pa.Array") -> "pa.Array":
+    """
+    Mark empty strings as null. The new validity bitmap is attached to the
+    existing offsets and data buffers, so the strings themselves are not copied.
+    """
+    valid = pc.fill_null(pc.not_equal(chunk, ""), False)
+    if chunk.offset or valid.offset:
+        # Bitmaps of sliced arrays start mid-buffer; copy instead
+        return pc.if_else(valid, chunk, pa.scalar(None, chunk.type))
+    return pa.Array.from_buffers(chunk.type, len(chunk), [valid.buffers()[1], *chunk.buffers()[1:]])
+
+
+def _arrow_table(frame: pd.DataFrame) -> "pa.Table":
+    """
+    Convert an export frame to an all-string Arrow table with empty strings
+    as null. large_string matches pandas' Arrow-backed str columns, so the
+    text columns (titles, abstracts) are taken over without a cast.
+    """
+    schema = pa.schema([(str(c), pa.large_string()) for c in frame.columns])
+    table = pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+    return pa.table({
+        name: pa.chunked_array([_null_empty(chunk) for chunk in column.chunks], type=column.type)
+        for name, column in zip(table.column_names, table.columns)
+    })
+
+
+def _write_csv(frame: pd.DataFrame, path: str, parquet: bool = False) -> None:
+    """
+    Write an export frame as UTF-8 CSV, using pyarrow's multithreaded writer
+    when available. Empty strings are written as null (unquoted empty
+    fields), so LOAD CSV leaves those properties unset exactly as it does
+    for the pandas to_csv output.
+    With parquet=True (pyarrow only) the same table is also written next to
+    the CSV as zstd-compressed Parquet, for fast re-reads outside Neo4j.
+    A path ending in .gz is written gzip-compressed (LOAD CSV reads it as is).
+    """
+    _write_csv_batches(iter([frame]), list(frame.columns), path, parquet)
+
+
+def _write_csv_batches(
+    batches: Iterator[pd.DataFrame],
+    columns: List[str],
+    path: str,
+    parquet: bool = False,
+) -> int:
+    """
+    Write frames with the given columns one after another into a single CSV
+    (and Parquet), so only one batch is held in memory at a time. Output is
+    the same as _write_csv on the concatenated frame. Returns the row count.
+    """
+    rows = 0
+    compressed = path.endswith(".gz")
+    if not HAS_PYARROW:
+        mode = "wb" if compressed else "w"
+        opener = (
+            gzip.open(path, mode, compresslevel=CSV_GZIP_LEVEL) if compressed
+            else open(path, mode, encoding="utf-8", newline="")
+        )
+        with opener as f:
+            header = True
+            for batch in batches:
+                text = batch.to_csv(index=False, header=header)
+                f.write(text.encode("utf-8") if compressed else text)
+                header = False
+                rows += len(batch)
+            if header:
+                text = pd.DataFrame(columns=columns).to_csv(index=False)
+                f.write(text.encode("utf-8") if compressed else text)
+        return rows
+
+    schema = pa.schema([(str(c), pa.large_string()) for c in columns])
+    sink = gzip.open(path, "wb", compresslevel=CSV_GZIP_LEVEL) if compressed else pa.OSFile(path, "wb")
+    base = path[:-len(".gz")] if compressed else path
+    parquet_writer = (
+        pq.ParquetWriter(os.path.splitext(base)[0] + ".parquet", schema, compression="zstd")
+        if parquet else None
+    )
+    try:
+        with pa_csv.CSVWriter(sink, schema) as writer:
+            for batch in batches:
+                table = _arrow_table(batch)
+                writer.write_table(table)
+                rows += len(batch)
+                if parquet_writer is not None:
+                    parquet_writer.write_table(table)
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+        sink.close()
+    return rows
+
+
+def _triangle_pairs(rows: np.ndarray, per_row: np.ndarray):
+    """
+    Row indices (i, j) of upper-triangle pairs: each row r is paired with the
+    per_row[r] rows that follow it, in np.triu_indices order for contiguous
+    groups, without the k x k cross-product of a self-merge.
+    """
+    i = np.repeat(rows, per_row)
+    j = i + 1 + np.arange(len(i)) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+    return i, j
+
+
+def _iter_same_year_pairs(document_ids: pd.Series, years: pd.Series) -> Iterator[pd.DataFrame]:
+    """
+    Yield the SAME_YEAR_AS document pairs in blocks of about PAIR_BLOCK_ROWS.
+    Years come in order of first appearance; within a year the i < j pairs
+    are generated a block of rows of the upper triangle at a time, each pair
+    stored in consistent (sorted) order. A pair can only repeat when one of
+    its documents sits on more than one row, so only those pairs are checked
+    against the ones already yielded.
+    """
+    dated = (document_ids != "") & (years != "")
+    document_ids, years = document_ids[dated], years[dated]
+    repeated_ids = document_ids.duplicated(keep=False).to_numpy()
+    codes, _ = pd.factorize(years)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(codes.max() + 2)) if len(codes) else [0]
+    document_ids = document_ids.to_numpy(dtype=object)
+    seen = set()
+
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        docs = document_ids[order[lo:hi]]
+        repeated = repeated_ids[order[lo:hi]]
+        per_row = np.arange(len(docs) - 1, 0, -1)
+        offsets = np.concatenate(([0], np.cumsum(per_row)))
+        start = 0
+        while start < len(per_row):
+            # Rows start..stop-1 of the triangle hold at most PAIR_BLOCK_ROWS
+            # pairs (always at least one row)
+            stop = np.searchsorted(offsets, offsets[start] + PAIR_BLOCK_ROWS, side="right") - 1
+            stop = max(stop, start + 1)
+            i, j = _triangle_pairs(np.arange(start, stop), per_row[start:stop])
+            start = stop
+
+            first, second = docs[i], docs[j]
+            swap = first > second
+            first, second = np.where(swap, second, first), np.where(swap, first, second)
+            check = np.flatnonzero(repeated[i] | repeated[j])
+            if len(check):
+                keep = np.ones(len(i), dtype=bool)
+                for k in check:
+                    pair = (first[k], second[k])
+                    if pair in seen:
+                        keep[k] = False
+                    else:
+                        seen.add(pair)
+                first, second = first[keep], second[keep]
+            yield pd.DataFrame({"document_id_1": first, "document_id_2": second})
+
+
 def export_neo4j_csvs(
     df: pd.DataFrame,
     out_dir: str = "./neo4j/import",
     export_keywords: bool = True,
+    export_parquet: bool = False,
+    export_gzip: bool = False,
 ) -> Dict[str, str]:
     """
     Writes Neo4j-friendly CSVs based on Knowledge Architect schema.
@@ -355,9 +712,36 @@ def export_neo4j_csvs(
     - RankingBody ID = VHB or ABDC
     - Ranking ID = RANKING_<body>_<value>
     - Year ID = YEAR_<yyyy>
+
+    export_parquet=True also writes a <name>.parquet copy of every CSV
+    (requires pyarrow); Neo4j keeps loading the CSVs.
+    export_gzip=True writes <name>.csv.gz instead of <name>.csv; pair it
+    with write_neo4j_import_cypher(compressed=True).
     """
+    # Resolve the directory once; every file path below is joined onto it
+    out_dir = os.path.abspath(out_dir)
+    csv_ext = ".csv.gz" if export_gzip else ".csv"
     ensure_dir(out_dir)
+    if export_parquet and not HAS_PYARROW:
+        print("[WARN] pyarrow not installed - skipping Parquet export")
+        export_parquet = False
     written = {}
+    # Each finished table is handed to the writer threads while the next one is built
+    pool = ThreadPoolExecutor(max_workers=EXPORT_WRITE_WORKERS)
+    pending = []
+
+    # Reshape once: every column used below exists and holds clean strings
+    # (positional index, so per-row tables below line up by label)
+    df = df.reindex(columns=EXPORT_COLUMNS, fill_value="").reset_index(drop=True)
+
+    # Journal IDs from the raw column: for a categorical journal_name (see
+    # CATEGORY_COLUMNS) only the category dictionary is hashed and mapped
+    journal_ids = make_stable_ids("JOURNAL", df["journal_name"]).astype(object)
+
+    # Categoricals cannot take "" as a fill value, so they become plain
+    # objects first
+    categorical = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+    df = df.astype({c: object for c in categorical}).fillna("").astype(str)
 
     # =========================================================
     # NODES
@@ -366,59 +750,56 @@ def export_neo4j_csvs(
     # -------------------------
     # Documents (formerly Papers)
     # -------------------------
-    documents = df.copy()
-    documents["document_id"] = documents["doi"].apply(lambda x: safe_str(x).strip())
-
-    # Select only Document properties according to schema
-    doc_cols = ["document_id", "title", "abstract", "doi", "url"]
-    doc_cols = [c for c in doc_cols if c in documents.columns or c == "document_id"]
-    documents_export = documents[["document_id", "title", "abstract", "doi"]].copy()
-    if "url" in documents.columns:
-        documents_export["url"] = documents["url"]
-
-    documents_path = os.path.join(out_dir, "documents.csv")
-    documents_export.to_csv(documents_path, index=False, encoding="utf-8")
+    # Only the Document properties according to schema (no full-frame copy)
+    document_ids = df["doi"].str.strip()
+    documents_export = pd.DataFrame({
+        "document_id": document_ids,
+        "title": df["title"],
+        "abstract": df["abstract"],
+        "doi": df["doi"],
+        "url": df["url"],
+    })
+
+    documents_path = os.path.join(out_dir, "documents" + csv_ext)
+    pending.append(pool.submit(_write_csv, documents_export, documents_path, export_parquet))
     written["documents"] = documents_path
 
     # -------------------------
     # Authors
     # -------------------------
-    author_rows: List[Dict[str, str]] = []
-
-    for _, row in df.iterrows():
-        for author_name in split_authors(row.get("authors", "")):
-            author_id = make_stable_id("AUTHOR", author_name)
-            author_rows.append({
-                "author_id": author_id,
-                "name": author_name,
-            })
-
-    authors_df = pd.DataFrame(author_rows).drop_duplicates(subset=["author_id"])
-    authors_path = os.path.join(out_dir, "authors.csv")
-    authors_df.to_csv(authors_path, index=False, encoding="utf-8")
+    # Whole-column values shared by the node and relationship tables below
+    dois = document_ids.to_numpy()
+    journals = df["journal_name"].str.strip()
+    # Same rule as extract_year, in one vectorized pass over the column
+    years = df["date"].str.extract(f"({_YEAR_RE.pattern})", expand=False).fillna("")
+
+    # One (row, author) entry per author mention, split/exploded in pandas
+    # once; HAS_AUTHOR and COLLABORATED_WITH both reuse this long table
+    author_edges = explode_semicolon_column(df.index, df["authors"])
+    author_edges = author_edges.assign(
+        document_id=dois[author_edges["key"].to_numpy(dtype=int)],
+        author_id=make_stable_ids("AUTHOR", author_edges["name"]),
+    )
+
+    # Node tables: first occurrence of each ID, found on the ID column alone,
+    # so payload columns are only gathered for the rows that are kept
+    authors_df = author_edges.loc[~author_edges["author_id"].duplicated(), ["author_id", "name"]]
+    authors_path = os.path.join(out_dir, "authors" + csv_ext)
+    pending.append(pool.submit(_write_csv, authors_df, authors_path, export_parquet))
     written["authors"] = authors_path
 
     # -------------------------
     # Journals
     # -------------------------
-    journal_rows: List[Dict[str, str]] = []
-
-    for _, row in df.iterrows():
-        journal_name = safe_str(row.get("journal_name", "")).strip()
-        if not journal_name:
-            continue
-
-        journal_id = make_stable_id("JOURNAL", journal_name)
-        journal_rows.append({
-            "journal_id": journal_id,
-            "name": journal_name,
-            "issn": safe_str(row.get("issn", "")),
-            "eissn": safe_str(row.get("eissn", "")),
-        })
-
-    journals_df = pd.DataFrame(journal_rows).drop_duplicates(subset=["journal_id"])
-    journals_path = os.path.join(out_dir, "journals.csv")
-    journals_df.to_csv(journals_path, index=False, encoding="utf-8")
+    first = ((journals != "") & ~journal_ids.duplicated()).to_numpy()
+    journals_df = pd.DataFrame({
+        "journal_id": journal_ids[first],
+        "name": journals[first],
+        "issn": df["issn"][first],
+        "eissn": df["eissn"][first],
+    })
+    journals_path = os.path.join(out_dir, "journals" + csv_ext)
+    pending.append(pool.submit(_write_csv, journals_df, journals_path, export_parquet))
     written["journals"] = journals_path
 
     # -------------------------
@@ -429,57 +810,38 @@ def export_neo4j_csvs(
         {"ranking_body_id": "ABDC", "name": "ABDC"},
     ]
     ranking_bodies_df = pd.DataFrame(ranking_bodies)
-    ranking_bodies_path = os.path.join(out_dir, "ranking_bodies.csv")
-    ranking_bodies_df.to_csv(ranking_bodies_path, index=False, encoding="utf-8")
+    ranking_bodies_path = os.path.join(out_dir, "ranking_bodies" + csv_ext)
+    pending.append(pool.submit(_write_csv, ranking_bodies_df, ranking_bodies_path, export_parquet))
     written["ranking_bodies"] = ranking_bodies_path
 
     # -------------------------
     # Rankings
     # -------------------------
-    ranking_rows: List[Dict[str, str]] = []
-
-    for _, row in df.iterrows():
-        # VHB Ranking
-        vhb_value = safe_str(row.get("vhbRanking", "")).strip()
-        if vhb_value:
-            ranking_id = f"RANKING_VHB_{vhb_value}"
-            ranking_rows.append({
-                "ranking_id": ranking_id,
-                "value": vhb_value,
-                "body": "VHB",
-            })
-
-        # ABDC Ranking
-        abdc_value = safe_str(row.get("abdcRanking", "")).strip()
-        if abdc_value:
-            ranking_id = f"RANKING_ABDC_{abdc_value}"
-            ranking_rows.append({
-                "ranking_id": ranking_id,
-                "value": abdc_value,
-                "body": "ABDC",
-            })
-
-    rankings_df = pd.DataFrame(ranking_rows).drop_duplicates(subset=["ranking_id"])
-    rankings_path = os.path.join(out_dir, "rankings.csv")
-    rankings_df.to_csv(rankings_path, index=False, encoding="utf-8")
+    # Long format: one row per (document, ranking body) with a value, VHB
+    # before ABDC within each document (stable sort on the row label)
+    per_document = pd.DataFrame({"journal": journals, "journal_id": journal_ids, "year": years})
+    ranked = pd.concat([
+        per_document.assign(value=df["vhbRanking"].str.strip(), body="VHB"),
+        per_document.assign(value=df["abdcRanking"].str.strip(), body="ABDC"),
+    ]).sort_index(kind="stable")
+    ranked = ranked[ranked["value"] != ""]
+    ranked["ranking_id"] = "RANKING_" + ranked["body"] + "_" + ranked["value"]
+
+    rankings_df = ranked.loc[~ranked["ranking_id"].duplicated(), ["ranking_id", "value", "body"]]
+    rankings_path = os.path.join(out_dir, "rankings" + csv_ext)
+    pending.append(pool.submit(_write_csv, rankings_df, rankings_path, export_parquet))
     written["rankings"] = rankings_path
 
     # -------------------------
     # Years
     # -------------------------
-    year_rows: List[Dict[str, str]] = []
-
-    for _, row in df.iterrows():
-        year = extract_year(row.get("date", ""))
-        if year:
-            year_rows.append({
-                "year_id": f"YEAR_{year}",
-                "year": year,
-            })
-
-    years_df = pd.DataFrame(year_rows).drop_duplicates(subset=["year_id"])
-    years_path = os.path.join(out_dir, "years.csv")
-    years_df.to_csv(years_path, index=False, encoding="utf-8")
+    known_years = years[(years != "") & ~years.duplicated()]
+    years_df = pd.DataFrame({
+        "year_id": "YEAR_" + known_years,
+        "year": known_years,
+    })
+    years_path = os.path.join(out_dir, "years" + csv_ext)
+    pending.append(pool.submit(_write_csv, years_df, years_path, export_parquet))
     written["years"] = years_path
 
     # =========================================================
@@ -489,228 +851,128 @@ def export_neo4j_csvs(
     # -------------------------
     # HAS_AUTHOR (Document -> Author)
     # -------------------------
-    has_author_rows: List[Dict[str, str]] = []
-
-    for _, row in df.iterrows():
-        doi = safe_str(row.get("doi", "")).strip()
-        if not doi:
-            continue
-
-        for author_name in split_authors(row.get("authors", "")):
-            author_id = make_stable_id("AUTHOR", author_name)
-            has_author_rows.append({
-                "document_id": doi,
-                "author_id": author_id,
-            })
-
-    has_author_df = pd.DataFrame(has_author_rows).drop_duplicates()
-    has_author_path = os.path.join(out_dir, "has_author.csv")
-    has_author_df.to_csv(has_author_path, index=False, encoding="utf-8")
+    has_author_df = author_edges.loc[
+        author_edges["document_id"] != "", ["document_id", "author_id"]
+    ].drop_duplicates()
+    has_author_path = os.path.join(out_dir, "has_author" + csv_ext)
+    pending.append(pool.submit(_write_csv, has_author_df, has_author_path, export_parquet))
     written["has_author"] = has_author_path
 
     # -------------------------
     # PUBLISHED_IN (Document -> Journal)
     # -------------------------
-    published_in_rows: List[Dict[str, str]] = []
-
-    for _, row in df.iterrows():
-        doi = safe_str(row.get("doi", "")).strip()
-        journal_name = safe_str(row.get("journal_name", "")).strip()
-        if not doi or not journal_name:
-            continue
-
-        journal_id = make_stable_id("JOURNAL", journal_name)
-        published_in_rows.append({
-            "document_id": doi,
-            "journal_id": journal_id,
-        })
-
-    published_in_df = pd.DataFrame(published_in_rows).drop_duplicates()
-    published_in_path = os.path.join(out_dir, "published_in.csv")
-    published_in_df.to_csv(published_in_path, index=False, encoding="utf-8")
+    published_in_df = pd.DataFrame({
+        "document_id": document_ids,
+        "journal_id": journal_ids,
+    })[(document_ids != "") & (journals != "")].drop_duplicates()
+    published_in_path = os.path.join(out_dir, "published_in" + csv_ext)
+    pending.append(pool.submit(_write_csv, published_in_df, published_in_path, export_parquet))
     written["published_in"] = published_in_path
 
     # -------------------------
     # HAS_RATING (Journal -> Ranking)
     # -------------------------
-    has_rating_rows: List[Dict[str, str]] = []
-
-    for _, row in df.iterrows():
-        journal_name = safe_str(row.get("journal_name", "")).strip()
-        if not journal_name:
-            continue
-
-        journal_id = make_stable_id("JOURNAL", journal_name)
-
-        # VHB Rating
-        vhb_value = safe_str(row.get("vhbRanking", "")).strip()
-        if vhb_value:
-            has_rating_rows.append({
-                "journal_id": journal_id,
-                "ranking_id": f"RANKING_VHB_{vhb_value}",
-            })
-
-        # ABDC Rating
-        abdc_value = safe_str(row.get("abdcRanking", "")).strip()
-        if abdc_value:
-            has_rating_rows.append({
-                "journal_id": journal_id,
-                "ranking_id": f"RANKING_ABDC_{abdc_value}",
-            })
-
-    has_rating_df = pd.DataFrame(has_rating_rows).drop_duplicates()
-    has_rating_path = os.path.join(out_dir, "has_rating.csv")
-    has_rating_df.to_csv(has_rating_path, index=False, encoding="utf-8")
+    has_rating_df = ranked.loc[ranked["journal"] != "", ["journal_id", "ranking_id"]].drop_duplicates()
+    has_rating_path = os.path.join(out_dir, "has_rating" + csv_ext)
+    pending.append(pool.submit(_write_csv, has_rating_df, has_rating_path, export_parquet))
     written["has_rating"] = has_rating_path
 
     # -------------------------
     # ISSUED_BY (Ranking -> RankingBody)
     # -------------------------
-    issued_by_rows: List[Dict[str, str]] = []
-
-    for _, row in rankings_df.iterrows():
-        ranking_id = row["ranking_id"]
-        body = row["body"]
-        issued_by_rows.append({
-            "ranking_id": ranking_id,
-            "ranking_body_id": body,
-        })
-
-    issued_by_df = pd.DataFrame(issued_by_rows).drop_duplicates()
-    issued_by_path = os.path.join(out_dir, "issued_by.csv")
-    issued_by_df.to_csv(issued_by_path, index=False, encoding="utf-8")
+    issued_by_df = rankings_df.rename(columns={"body": "ranking_body_id"})[
+        ["ranking_id", "ranking_body_id"]
+    ].drop_duplicates()
+    issued_by_path = os.path.join(out_dir, "issued_by" + csv_ext)
+    pending.append(pool.submit(_write_csv, issued_by_df, issued_by_path, export_parquet))
     written["issued_by"] = issued_by_path
 
     # -------------------------
     # COLLABORATED_WITH (Author -> Author)
     # Co-authors on the same document
     # -------------------------
-    collaborated_rows: List[Dict[str, str]] = []
-
-    for _, row in df.iterrows():
-        authors = split_authors(row.get("authors", ""))
-        if len(authors) < 2:
-            continue
-
-        # Create pairs of co-authors
-        for i, author1 in enumerate(authors):
-            for author2 in authors[i+1:]:
-                id1 = make_stable_id("AUTHOR", author1)
-                id2 = make_stable_id("AUTHOR", author2)
-                # Store in consistent order to avoid duplicates
-                if id1 < id2:
-                    collaborated_rows.append({
-                        "author_id_1": id1,
-                        "author_id_2": id2,
-                    })
-                else:
-                    collaborated_rows.append({
-                        "author_id_1": id2,
-                        "author_id_2": id1,
-                    })
-
-    collaborated_df = pd.DataFrame(collaborated_rows).drop_duplicates()
-    collaborated_path = os.path.join(out_dir, "collaborated_with.csv")
-    collaborated_df.to_csv(collaborated_path, index=False, encoding="utf-8")
+    # Author rows of a document are contiguous, so each row pairs with the
+    # rows after it up to the end of its document (i < j, in author order)
+    keys = author_edges["key"].to_numpy(dtype=int)
+    ends = np.append(np.flatnonzero(np.diff(keys)) + 1, len(keys))
+    group_end = np.repeat(ends, np.diff(ends, prepend=0))
+    rows = np.arange(len(keys))
+    i, j = _triangle_pairs(rows, group_end - rows - 1)
+    author_ids = author_edges["author_id"].to_numpy(dtype=object)
+
+    # Store in consistent order to avoid duplicates
+    first, second = author_ids[i], author_ids[j]
+    swap = first > second
+    collaborated_df = pd.DataFrame({
+        "author_id_1": np.where(swap, second, first),
+        "author_id_2": np.where(swap, first, second),
+    }).drop_duplicates()
+    collaborated_path = os.path.join(out_dir, "collaborated_with" + csv_ext)
+    pending.append(pool.submit(_write_csv, collaborated_df, collaborated_path, export_parquet))
     written["collaborated_with"] = collaborated_path
 
     # -------------------------
     # SAME_YEAR_AS (Document -> Document)
     # Documents published in the same year
     # -------------------------
-    # Group documents by year
-    docs_by_year: Dict[str, List[str]] = {}
-    for _, row in df.iterrows():
-        doi = safe_str(row.get("doi", "")).strip()
-        year = extract_year(row.get("date", ""))
-        if doi and year:
-            if year not in docs_by_year:
-                docs_by_year[year] = []
-            docs_by_year[year].append(doi)
-
-    same_year_rows: List[Dict[str, str]] = []
-    for year, docs in docs_by_year.items():
-        if len(docs) < 2:
-            continue
-        for i, doc1 in enumerate(docs):
-            for doc2 in docs[i+1:]:
-                # Store in consistent order
-                if doc1 < doc2:
-                    same_year_rows.append({
-                        "document_id_1": doc1,
-                        "document_id_2": doc2,
-                    })
-                else:
-                    same_year_rows.append({
-                        "document_id_1": doc2,
-                        "document_id_2": doc1,
-                    })
-
-    same_year_df = pd.DataFrame(same_year_rows).drop_duplicates()
-    same_year_path = os.path.join(out_dir, "same_year_as.csv")
-    same_year_df.to_csv(same_year_path, index=False, encoding="utf-8")
+    same_year_path = os.path.join(out_dir, "same_year_as" + csv_ext)
+    same_year_written = pool.submit(
+        _write_csv_batches,
+        _iter_same_year_pairs(document_ids, years),
+        ["document_id_1", "document_id_2"],
+        same_year_path,
+        export_parquet,
+    )
     written["same_year_as"] = same_year_path
 
     # -------------------------
     # IS_VALID_IN_YEAR (Ranking -> Year)
     # Link rankings to the years of documents that have them
     # -------------------------
-    valid_in_year_rows: List[Dict[str, str]] = []
-
-    for _, row in df.iterrows():
-        year = extract_year(row.get("date", ""))
-        if not year:
-            continue
-
-        year_id = f"YEAR_{year}"
-
-        vhb_value = safe_str(row.get("vhbRanking", "")).strip()
-        if vhb_value:
-            valid_in_year_rows.append({
-                "ranking_id": f"RANKING_VHB_{vhb_value}",
-                "year_id": year_id,
-            })
-
-        abdc_value = safe_str(row.get("abdcRanking", "")).strip()
-        if abdc_value:
-            valid_in_year_rows.append({
-                "ranking_id": f"RANKING_ABDC_{abdc_value}",
-                "year_id": year_id,
-            })
-
-    valid_in_year_df = pd.DataFrame(valid_in_year_rows).drop_duplicates()
-    valid_in_year_path = os.path.join(out_dir, "is_valid_in_year.csv")
-    valid_in_year_df.to_csv(valid_in_year_path, index=False, encoding="utf-8")
+    dated = ranked[ranked["year"] != ""]
+    valid_in_year_df = pd.DataFrame({
+        "ranking_id": dated["ranking_id"],
+        "year_id": "YEAR_" + dated["year"],
+    }).drop_duplicates()
+    valid_in_year_path = os.path.join(out_dir, "is_valid_in_year" + csv_ext)
+    pending.append(pool.submit(_write_csv, valid_in_year_df, valid_in_year_path, export_parquet))
     written["is_valid_in_year"] = valid_in_year_path
 
     # =========================================================
     # PRINT SUMMARY
     # =========================================================
-    print("\n[EXPORT] Neo4j CSV Export complete:")
-    print("\n  Nodes:")
-    print(f"   - documents:      {len(documents_export)}")
-    print(f"   - authors:        {len(authors_df)}")
-    print(f"   - journals:       {len(journals_df)}")
-    print(f"   - ranking_bodies: {len(ranking_bodies_df)}")
-    print(f"   - rankings:       {len(rankings_df)}")
-    print(f"   - years:          {len(years_df)}")
-    print("\n  Relationships:")
-    print(f"   - has_author:         {len(has_author_df)}")
-    print(f"   - published_in:       {len(published_in_df)}")
-    print(f"   - has_rating:         {len(has_rating_df)}")
-    print(f"   - issued_by:          {len(issued_by_df)}")
-    print(f"   - collaborated_with:  {len(collaborated_df)}")
-    print(f"   - same_year_as:       {len(same_year_df)}")
-    print(f"   - is_valid_in_year:   {len(valid_in_year_df)}")
-
-    print(f"\n[DIR] Output dir: {os.path.abspath(out_dir)}")
+    same_year_count = same_year_written.result()
+    for future in pending:
+        future.result()
+    pool.shutdown()
+
+    print("\n".join([
+        "\n[EXPORT] Neo4j CSV Export complete:",
+        "\n  Nodes:",
+        f"   - documents:      {len(documents_export)}",
+        f"   - authors:        {len(authors_df)}",
+        f"   - journals:       {len(journals_df)}",
+        f"   - ranking_bodies: {len(ranking_bodies_df)}",
+        f"   - rankings:       {len(rankings_df)}",
+        f"   - years:          {len(years_df)}",
+        "\n  Relationships:",
+        f"   - has_author:         {len(has_author_df)}",
+        f"   - published_in:       {len(published_in_df)}",
+        f"   - has_rating:         {len(has_rating_df)}",
+        f"   - issued_by:          {len(issued_by_df)}",
+        f"   - collaborated_with:  {len(collaborated_df)}",
+        f"   - same_year_as:       {same_year_count}",
+        f"   - is_valid_in_year:   {len(valid_in_year_df)}",
+        f"\n[DIR] Output dir: {out_dir}",
+    ]))
     return written
 
 
-def write_neo4j_import_cypher(out_dir: str = "./neo4j/import") -> str:
+def write_neo4j_import_cypher(out_dir: str = "./neo4j/import", compressed: bool = False) -> str:
     """
     Writes an import.cypher that you can run in Neo4j Browser.
     Based on Knowledge Architect schema with all Nodes and Relationships.
+    compressed=True loads the <name>.csv.gz files of export_neo4j_csvs(export_gzip=True).
 
     Assumes you mounted Neo4j /import to this directory.
     In Neo4j Browser you can run:
@@ -837,6 +1099,9 @@ MATCH (y:Year {year_id: row.year_id})
 MERGE (r)-[:IS_VALID_IN_YEAR]->(y);
 """.strip()
 
+    if compressed:
+        cypher = cypher.replace(".csv' AS row", ".csv.gz' AS row")
+
     with open(cypher_path, "w", encoding="utf-8") as f:
         f.write(cypher + "\n")
 
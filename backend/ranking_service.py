@@ -5,7 +5,10 @@ RankingService - Lookup VHB and ABDC journal rankings by ISSN or journal name
 import json
 import re
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
 
 # Try to import rapidfuzz for fuzzy matching, fall back to no fuzzy matching
 try:
@@ -15,6 +18,11 @@ except ImportError:
     HAS_RAPIDFUZZ = False
 
 _DATA_DIR = Path(__file__).resolve().parent / "data"
+_WS_RE = re.compile(r"\s+")
+
+# Unmatched names scored per rapidfuzz.process.cdist call (bounds the
+# names x journals score matrix)
+FUZZY_BATCH_SIZE = 1024
 
 
 class RankingService:
@@ -72,6 +80,75 @@ class RankingService:
         return self._lookup(journal_title, issn, eissn,
                            self._abdc_issn, self._abdc_name)
 
+    def get_vhb_rankings(self, journal_titles: pd.Series,
+                         issns: pd.Series,
+                         eissns: pd.Series) -> pd.Series:
+        """Vectorized get_vhb_ranking over aligned string columns."""
+        return self._lookup_many(journal_titles, issns, eissns,
+                                 self._vhb_issn, self._vhb_name)
+
+    def get_abdc_rankings(self, journal_titles: pd.Series,
+                          issns: pd.Series,
+                          eissns: pd.Series) -> pd.Series:
+        """Vectorized get_abdc_ranking over aligned string columns."""
+        return self._lookup_many(journal_titles, issns, eissns,
+                                 self._abdc_issn, self._abdc_name)
+
+    def _lookup_many(self, journal_titles: pd.Series,
+                     issns: pd.Series,
+                     eissns: pd.Series,
+                     issn_map: Dict[str, str],
+                     name_map: Dict[str, str]) -> pd.Series:
+        """
+        Same precedence as _lookup (ISSN, eISSN, exact name, fuzzy name), but
+        the exact lookups are Series.map calls and fuzzy matching runs once
+        per distinct unmatched name instead of once per row.
+        Many papers share a journal, so each distinct (title, issn, eissn)
+        triple is resolved once and the result broadcast back to the rows.
+        """
+        codes, triples = pd.factorize(pd.MultiIndex.from_arrays([journal_titles, issns, eissns]))
+        titles, issn_keys, eissn_keys = (
+            pd.Series(triples.get_level_values(i), dtype=object) for i in range(3)
+        )
+
+        def exact(keys: pd.Series, mapping: Dict[str, str]) -> pd.Series:
+            # Empty keys and empty ratings count as "not found"
+            return keys.map(mapping).where(keys != "").replace("", None)
+
+        rating = exact(issn_keys.str.replace("-", "").str.upper(), issn_map)
+        rating = rating.fillna(exact(eissn_keys.str.replace("-", "").str.upper(), issn_map))
+
+        normed = titles.str.replace(_WS_RE, " ", regex=True).str.strip().str.lower()
+        rating = rating.fillna(exact(normed, name_map).where(titles != ""))
+
+        if HAS_RAPIDFUZZ and name_map:
+            missing = rating.isna() & (titles != "")
+            fuzzy = self._fuzzy_many(list(normed[missing].unique()), name_map)
+            if fuzzy:
+                rating = rating.fillna(normed.where(missing).map(fuzzy))
+
+        rating = rating.fillna("N/A").to_numpy(dtype=object)
+        return pd.Series(rating[codes], index=journal_titles.index, dtype=object)
+
+    @staticmethod
+    def _fuzzy_many(names: List[str], name_map: Dict[str, str]) -> Dict[str, str]:
+        """
+        Batched version of the fuzzy step in _lookup: score all names against
+        all journal names with rapidfuzz's multithreaded cdist and keep the
+        best match above 90 (first one on ties, like extractOne).
+        """
+        keys = list(name_map.keys())
+        matches = {}
+        for start in range(0, len(names), FUZZY_BATCH_SIZE):
+            batch = names[start:start + FUZZY_BATCH_SIZE]
+            scores = process.cdist(batch, keys, scorer=fuzz.ratio,
+                                   dtype=np.float64, workers=-1)
+            best = scores.argmax(axis=1)
+            for name, idx, score in zip(batch, best, scores[np.arange(len(batch)), best]):
+                if score > 90:
+                    matches[name] = name_map[keys[idx]]
+        return matches
+
     def _lookup(self, journal_title: Optional[str],
                 issn: Optional[str],
                 eissn: Optional[str],
@@ -110,7 +187,7 @@ class RankingService:
     @staticmethod
     def _norm(name: str) -> str:
         """Normalize journal name: lowercase + collapse whitespace."""
-        return re.sub(r"\s+", " ", name).strip().lower()
+        return _WS_RE.sub(" ", name).strip().lower()
 
     @staticmethod
     def _clean_issn(raw: str) -> str:
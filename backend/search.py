@@ -5,7 +5,16 @@ Hybrid Search Engine: Combines Vector Search (ChromaDB) + Knowledge Graph (Neo4j
 """
 
 import os
+import re
+import glob
+import hashlib
 import shutil
+import threading
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import torch
+from concurrent.futures import ThreadPoolExecutor
 from sentence_transformers import SentenceTransformer
 from chromadb import PersistentClient
 from langchain_ollama import OllamaLLM
@@ -13,53 +22,356 @@ from langchain_community.graphs import Neo4jGraph
 from langchain_community.chains.graph_qa.cypher import GraphCypherQAChain
 from langchain_core.prompts import PromptTemplate
 from neo4j import GraphDatabase  # Plain driver for direct Cypher (no APOC needed)
-from backend.etl import safe_str
 
+# Try to import ONNX Runtime for the optional quantized encoder backend
+try:
+    import onnxruntime  # noqa: F401
+    HAS_ONNXRUNTIME = True
+except ImportError:
+    HAS_ONNXRUNTIME = False
+
+# Embedding model settings: GPU (FP16, bigger batches) if available,
+# otherwise use every CPU core
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBED_DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+ENCODE_BATCH_SIZE = int(os.getenv("ENCODE_BATCH_SIZE", "256" if EMBED_DEVICE == "cuda" else "128"))
+EMBED_FP16 = os.getenv("EMBED_FP16", "true").lower() == "true"
+if EMBED_DEVICE == "cpu":
+    torch.set_num_threads(os.cpu_count() or 1)
+
+# Encoder backend: "torch" (default) or "onnx" (CPU, int8-quantized weights
+# shipped with the model repo; needs sentence-transformers[onnx])
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()
+ONNX_MODEL_FILE = os.getenv("ONNX_MODEL_FILE", "onnx/model_quint8_avx2.onnx")
+
+# HNSW index settings for new collections. construction_ef is the main
+# ingest-cost knob: lower it (e.g. 64) when indexing speed matters more than recall.
+HNSW_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:construction_ef": 128,
+    "hnsw:M": 24,
+    "hnsw:search_ef": 100,
+    "hnsw:num_threads": os.cpu_count() or 1
+}
+
+# On-disk cache of corpus embeddings (float32, exactly what gets indexed),
+# keyed by a hash of the encoder (model, backend, device, precision) and the
+# document texts, so rebuilding the same corpus skips the encoder.
+# Set EMBED_CACHE_DIR to an empty string to disable.
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "./embedding_cache")
+EMBED_CACHE_MAX_FILES = 8
+
+# Per-query [DEBUG] tracing of the graph routing (off by default: it prints
+# on every request, including the pattern checks of should_use_graph)
+SEARCH_DEBUG = os.getenv("SEARCH_DEBUG", "false").lower() == "true"
+
+# Trigger phrases for should_use_graph. Plain substring tests: on typical
+# queries they measured faster than one compiled regex alternation.
+GRAPH_AUTHOR_PATTERNS = (
+    "written", "wrote", "author", "papers by", "paper by", "works by",
+    "collaborated", "collaborate", "co-author", "coauthor", "co-authored",
+    "topics by", "write about", "research by", "what does", "publication",
+    "did", "together", "joint",
+)
+GRAPH_TOPIC_PATTERNS = ("keyword", "topic", "about", "related to", "papers on", "paper on", "research on")
+_QUOTED_RE = re.compile(r"['\"][^'\"]+['\"]")
+
+# Author-name extraction for graph_search
+_NAME_AFTER_PREPOSITION_RE = re.compile(r'\b(?:by|from|of|with)\s+([A-Z][a-zA-ZäöüßÄÖÜ]*)')
+_NAME_BEFORE_VERB_RE = re.compile(r'does\s+([A-Z][a-zA-ZäöüßÄÖÜ]*)\s+(?:write|research|work|study)')
+_QUOTED_NAME_RE = re.compile(r"['\"]([^'\"]+)['\"]")
+_LAST_FIRST_NAME_RE = re.compile(r'\b([A-Z][a-zA-Z]+,\s*[A-Z][a-zA-Z]+)\b')
+# Common words that are NOT names
+_NON_NAME_WORDS = frozenset({
+    'which', 'who', 'what', 'paper', 'papers', 'author', 'authors',
+    'written', 'wrote', 'write', 'the', 'a', 'an', 'is', 'are', 'was', 'were',
+    'find', 'show', 'list', 'all', 'about', 'on', 'in', 'by', 'from', 'with',
+    'topics', 'topic', 'does', 'did', 'do', 'research', 'collaborate',
+    'collaborated', 'work', 'worked', 'keywords', 'keyword',
+})
+
+# Documents per encode/collection.add batch (bounded payloads instead of one huge insert)
+CHROMA_ADD_BATCH_SIZE = 5000
+
+
+# Singleton embedding model (shared by indexing and search)
+_embedding_model = None
+_embedding_model_lock = threading.Lock()
+
+
+def _debug(message: str) -> None:
+    """Print a [DEBUG] trace line when SEARCH_DEBUG is enabled."""
+    if SEARCH_DEBUG:
+        print(f"   [DEBUG] {message}")
+
+
+def _extract_author_name(text):
+    """Extract author name from query - case insensitive"""
+    # Pattern 1: "by/from/of/with [Name]" - name after preposition
+    match = _NAME_AFTER_PREPOSITION_RE.search(text)
+    if match:
+        name = match.group(1).strip("?,.")
+        if name.lower() not in _NON_NAME_WORDS:
+            return name
+
+    # Pattern 2: "[Name] write/research/collaborate" - name before verb
+    match = _NAME_BEFORE_VERB_RE.search(text)
+    if match:
+        name = match.group(1).strip("?,.")
+        if name.lower() not in _NON_NAME_WORDS:
+            return name
+
+    # Pattern 3: Find capitalized word that's not a common word
+    for word in text.split():
+        clean_word = word.strip("?,.")
+        # Must start with uppercase and not be a common word
+        if clean_word and len(clean_word) > 1 and clean_word[0].isupper():
+            if clean_word.lower() not in _NON_NAME_WORDS:
+                return clean_word
+
+    return None
+
+
+def _extract_multiple_authors(text):
+    """Extract multiple author names from query, especially quoted names"""
+    authors = []
+
+    # Pattern 1: Names in single or double quotes like 'Ahmadi, Leila' or "Bilal, Muhammad"
+    for name in _QUOTED_NAME_RE.findall(text):
+        name = name.strip()
+        if name and len(name) > 2:
+            authors.append(name)
+
+    # Pattern 2: Names in format "Last, First" without quotes
+    if not authors:
+        authors.extend(_LAST_FIRST_NAME_RE.findall(text))
+
+    return authors
+
+
+def get_embedding_model():
+    """Get or load the SentenceTransformer singleton (loaded once, even by concurrent requests)."""
+    global _embedding_model
+    if _embedding_model is None:
+        with _embedding_model_lock:
+            if _embedding_model is None:
+                if EMBED_BACKEND == "onnx" and HAS_ONNXRUNTIME:
+                    print(f"[EMBED] Using ONNX Runtime encoder ({ONNX_MODEL_FILE})")
+                    model = SentenceTransformer(
+                        EMBED_MODEL_NAME,
+                        backend="onnx",
+                        model_kwargs={"file_name": ONNX_MODEL_FILE}
+                    )
+                else:
+                    if EMBED_BACKEND == "onnx":
+                        print("[WARN] onnxruntime not installed, using the PyTorch encoder")
+                    model = SentenceTransformer(EMBED_MODEL_NAME, device=EMBED_DEVICE)
+                    if EMBED_DEVICE == "cuda" and EMBED_FP16:
+                        # Half precision on GPU (tiny embedding drift, much faster)
+                        model.half()
+                # Publish only the fully prepared model to lock-free readers
+                _embedding_model = model
+    return _embedding_model
+
+
+@lru_cache(maxsize=256)
+def encode_query(text: str) -> np.ndarray:
+    """Embed a query/topic string; repeated strings are served from an LRU cache."""
+    embedding = np.asarray(get_embedding_model().encode(text, normalize_embeddings=True), dtype=np.float32)
+    embedding.flags.writeable = False  # shared between callers
+    return embedding
+
+
+def _iter_embeddings(contents):
+    """
+    Embed documents CHROMA_ADD_BATCH_SIZE at a time, yielding
+    (start, stop, embeddings) with L2-normalized float32 embeddings.
+    Spreads the work over all GPUs when more than one is available.
+    """
+    model = get_embedding_model()
+    pool = None
+    if EMBED_DEVICE == "cuda" and torch.cuda.device_count() > 1 and EMBED_BACKEND != "onnx":
+        pool = model.start_multi_process_pool()
+    try:
+        for start in range(0, len(contents), CHROMA_ADD_BATCH_SIZE):
+            stop = min(start + CHROMA_ADD_BATCH_SIZE, len(contents))
+            chunk = contents[start:stop]
+            if pool is not None:
+                embeddings = model.encode_multi_process(
+                    chunk, pool, batch_size=ENCODE_BATCH_SIZE, normalize_embeddings=True
+                )
+            else:
+                embeddings = model.encode(
+                    chunk,
+                    batch_size=ENCODE_BATCH_SIZE,
+                    normalize_embeddings=True,
+                    convert_to_numpy=True
+                )
+            # FP16 models return float16; Chroma and the similarity code expect float32
+            yield start, stop, np.asarray(embeddings, dtype=np.float32)
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)
 
-def create_documents_and_metadata(df):
-    """Prepare documents for embedding"""
-    contents, metadatas, ids = [], [], []
-
-    for _, row in df.iterrows():
-        doi = safe_str(row.get("doi", "")).strip()
-        if not doi:
-            continue
-
-        title = row["title"]
-        abstract = row["abstract"]
-        url = row.get("url", "")
-        link = url if url else f"https://doi.org/{doi}"
-
-        # Document for embedding
-        content = f"""
-Title: {title}
-Abstract: {abstract}
-Authors: {row["authors"]}
-Journal: {row["journal_name"]}
-Year: {row["date"]}
-""".strip()
-
-        # Metadata - include all fields for search results
-        snippet = abstract[:200].strip() + ("..." if len(abstract) > 200 else "")
-
-        contents.append(content)
-        metadatas.append({
-            "title": title,
-            "authors": row["authors"],
-            "journal": row["journal_name"],
-            "year": row["date"],
-            "doi": doi,
-            "url": link,
-            "abstract_snippet": snippet,
-            "abstract": abstract,  # Full abstract
-            "access_link": link,
-            "vhbRanking": safe_str(row.get("vhbRanking", "")),
-            "abdcRanking": safe_str(row.get("abdcRanking", "")),
-            "citations": safe_str(row.get("citations", ""))
-        })
-        ids.append(doi)
 
-    return contents, metadatas, ids
+def _text_column(df, column):
+    """Column as clean strings ("" for NaN/None), or all "" if it is missing."""
+    if column not in df.columns:
+        return pd.Series("", index=df.index)
+    values = df[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Categoricals (etl.CATEGORY_COLUMNS) cannot take "" as a fill value
+        values = values.astype(object)
+    return values.fillna("").astype(str)
+
+
+def create_documents_and_metadata(df):
+    """Prepare documents for embedding (vectorized over whole columns)"""
+    dois = _text_column(df, "doi").str.strip()
+    has_doi = dois != ""
+    df, dois = df[has_doi], dois[has_doi]
+
+    titles = _text_column(df, "title")
+    abstracts = _text_column(df, "abstract")
+    authors = _text_column(df, "authors")
+    journals = _text_column(df, "journal_name")
+    years = _text_column(df, "date")
+    urls = _text_column(df, "url")
+    links = urls.where(urls != "", "https://doi.org/" + dois)
+
+    # Document for embedding
+    contents = (
+        "Title: " + titles
+        + "\nAbstract: " + abstracts
+        + "\nAuthors: " + authors
+        + "\nJournal: " + journals
+        + "\nYear: " + years
+    ).str.strip()
+
+    # Metadata - include all fields for search results
+    snippets = abstracts.str[:200].str.strip() + np.where(abstracts.str.len() > 200, "...", "")
+
+    metadatas = pd.DataFrame({
+        "title": titles,
+        "authors": authors,
+        "journal": journals,
+        "year": years,
+        "doi": dois,
+        "url": links,
+        "abstract_snippet": snippets,
+        "abstract": abstracts,  # Full abstract
+        "access_link": links,
+        "vhbRanking": _text_column(df, "vhbRanking"),
+        "abdcRanking": _text_column(df, "abdcRanking"),
+        "citations": _text_column(df, "citations")
+    })
+
+    return contents.tolist(), metadatas.to_dict("records"), dois.tolist()
+
+
+def _iter_cached(embeddings):
+    """Same shape of batches as _iter_embeddings, from precomputed embeddings."""
+    for start in range(0, len(embeddings), CHROMA_ADD_BATCH_SIZE):
+        stop = min(start + CHROMA_ADD_BATCH_SIZE, len(embeddings))
+        yield start, stop, embeddings[start:stop]
+
+
+def _index_documents(collection, ids, contents, metadatas, embeddings=None):
+    """
+    Embed and insert documents batch by batch. A writer thread adds batch i
+    to Chroma while batch i+1 is being encoded (at most one write in flight).
+    Precomputed embeddings (in input order) skip the encoder.
+    Returns the embeddings in input order.
+    """
+    # Sort by length once so every batch pads to similar lengths (encode()
+    # only sorts within a call). Rows travel with their ids, so the
+    # collection does not care about insertion order.
+    order = np.argsort([len(c) for c in contents], kind="stable")
+    ids = [ids[i] for i in order]
+    contents = [contents[i] for i in order]
+    metadatas = [metadatas[i] for i in order]
+    if embeddings is None:
+        batches = _iter_embeddings(contents)
+    else:
+        batches = _iter_cached(embeddings[order])
+
+    total = len(ids)
+    done = []
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        pending = None
+        for start, stop, batch in batches:
+            if pending is not None:
+                pending.result()
+            # No documents= payload: the text is rebuilt from metadata on
+            # demand (document_text), so storing it again only inflates writes
+            pending = writer.submit(
+                collection.add,
+                ids=ids[start:stop],
+                embeddings=batch,
+                metadatas=metadatas[start:stop]
+            )
+            done.append(batch)
+            if total > CHROMA_ADD_BATCH_SIZE:
+                print(f"   [BATCH] Indexed {stop}/{total}")
+        if pending is not None:
+            pending.result()
+
+    # Undo the length sort
+    result = np.empty((total, done[0].shape[1]) if done else (0, 0), dtype=np.float32)
+    if done:
+        result[order] = np.concatenate(done)
+    return result
+
+
+def _embedding_cache_path(contents):
+    """Cache file for this exact corpus text and encoder, or None if disabled."""
+    if not EMBED_CACHE_DIR:
+        return None
+    precision = "fp16" if EMBED_DEVICE == "cuda" and EMBED_FP16 else "fp32"
+    key = f"{EMBED_MODEL_NAME}|{EMBED_BACKEND}|{ONNX_MODEL_FILE}|{EMBED_DEVICE}|{precision}"
+    h = hashlib.sha1(key.encode("utf-8"))
+    for content in contents:
+        h.update(content.encode("utf-8"))
+        h.update(b"\0")
+    return os.path.join(EMBED_CACHE_DIR, f"{h.hexdigest()}.npy")
+
+
+def _load_cached_embeddings(cache_path, count):
+    if not cache_path or not os.path.exists(cache_path):
+        return None
+    try:
+        embeddings = np.load(cache_path).astype(np.float32, copy=False)
+    except (OSError, ValueError):
+        return None
+    return embeddings if len(embeddings) == count else None
+
+
+def _save_cached_embeddings(cache_path, embeddings):
+    if not cache_path:
+        return
+    try:
+        os.makedirs(EMBED_CACHE_DIR, exist_ok=True)
+        np.save(cache_path, embeddings.astype(np.float32, copy=False))
+        # Keep only the newest few corpora
+        cached = sorted(glob.glob(os.path.join(EMBED_CACHE_DIR, "*.npy")), key=os.path.getmtime)
+        for old in cached[:-EMBED_CACHE_MAX_FILES]:
+            os.remove(old)
+    except OSError as e:
+        print(f"[WARN] Could not write embedding cache: {e}")
+
+
+def document_text(meta):
+    """
+    Rebuild a paper's embedded document text from its metadata (same layout
+    as create_documents_and_metadata), so queries need not fetch documents.
+    """
+    return (
+        f"Title: {meta.get('title', '')}\n"
+        f"Abstract: {meta.get('abstract', '')}\n"
+        f"Authors: {meta.get('authors', '')}\n"
+        f"Journal: {meta.get('journal', '')}\n"
+        f"Year: {meta.get('year', '')}"
+    ).strip()
 
 
 def create_vector_store(contents, metadatas, ids, db_path, collection_name):
@@ -69,9 +381,6 @@ def create_vector_store(contents, metadatas, ids, db_path, collection_name):
 
     print("\n[EMBED] Generating embeddings...")
 
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    embeddings = model.encode(contents, normalize_embeddings=True).tolist()
-
     # Force close any existing connections
     if os.path.exists(db_path):
         print("[CLEANUP] Cleaning up old database...")
@@ -93,15 +402,19 @@ def create_vector_store(contents, metadatas, ids, db_path, collection_name):
     client = PersistentClient(path=db_path)
     collection = client.get_or_create_collection(
         name=collection_name,
-        metadata={"hnsw:space": "cosine"}
+        metadata=HNSW_METADATA
     )
 
-    collection.add(
-        ids=ids,
-        embeddings=embeddings,
-        documents=contents,
-        metadatas=metadatas
-    )
+    # Reuse embeddings from an earlier run over the same corpus
+    cache_path = _embedding_cache_path(contents)
+    cached = _load_cached_embeddings(cache_path, len(contents))
+    if cached is not None:
+        print("[CACHE] Reusing cached embeddings")
+
+    # float32 ndarrays go straight to Chroma (no per-value Python floats)
+    embeddings = _index_documents(collection, ids, contents, metadatas, embeddings=cached)
+    if cached is None:
+        _save_cached_embeddings(cache_path, embeddings)
 
     print(f"[OK] Indexed {len(ids)} documents")
 
@@ -109,7 +422,8 @@ def create_vector_store(contents, metadatas, ids, db_path, collection_name):
 class HybridSearchEngine:
     """Combines semantic search + knowledge graph"""
 
-    def __init__(self, db_path, collection_name, neo4j_url, neo4j_user, neo4j_pass, llm_model="llama3.2"):
+    def __init__(self, db_path, collection_name, neo4j_url, neo4j_user, neo4j_pass, llm_model="llama3.2",
+                 neo4j_driver=None):
         print("\n[INIT] Initializing Hybrid Search Engine...")
 
         # LLM - Using faster model by default
@@ -122,7 +436,7 @@ class HybridSearchEngine:
         print(f"[OK] LLM loaded ({llm_model})")
 
         # Vector store
-        self.vector_model = SentenceTransformer("all-MiniLM-L6-v2")
+        self.vector_model = get_embedding_model()
         self.collection = PersistentClient(path=db_path).get_collection(collection_name)
         print("[OK] Vector store connected")
 
@@ -131,7 +445,8 @@ class HybridSearchEngine:
         self.neo4j_driver = None
         try:
             # Use plain neo4j driver - doesn't require APOC
-            self.neo4j_driver = GraphDatabase.driver(neo4j_url, auth=(neo4j_user, neo4j_pass))
+            # (reuse the caller's long-lived driver/connection pool if given)
+            self.neo4j_driver = neo4j_driver or GraphDatabase.driver(neo4j_url, auth=(neo4j_user, neo4j_pass))
 
             # Test connection with a simple query
             with self.neo4j_driver.session() as session:
@@ -176,6 +491,27 @@ Cypher Query:"""
             print(f"[WARN] Neo4j connection failed: {e}")
             self.graph_available = False
 
+    def add_documents(self, contents, metadatas, ids) -> int:
+        """
+        Embed and add only the documents whose ids are not in the collection yet.
+        Returns the number of documents added.
+        """
+        existing = set(self.collection.get(ids=ids, include=[])["ids"])
+        new_rows = [i for i, doc_id in enumerate(ids) if doc_id not in existing]
+        if not new_rows:
+            print("[EMBED] No new documents to index")
+            return 0
+
+        print(f"[EMBED] Generating embeddings for {len(new_rows)} new documents...")
+        _index_documents(
+            self.collection,
+            [ids[i] for i in new_rows],
+            [contents[i] for i in new_rows],
+            [metadatas[i] for i in new_rows]
+        )
+        print(f"[OK] Indexed {len(new_rows)} new documents ({len(existing)} already present)")
+        return len(new_rows)
+
     def _run_cypher(self, cypher: str, params: dict = None) -> list:
         """Run Cypher query using plain neo4j driver"""
         if not self.neo4j_driver:
@@ -187,33 +523,28 @@ Cypher Query:"""
     def should_use_graph(self, query: str) -> bool:
         """Check if query needs graph data"""
         if not self.graph_available:
-            print("   [DEBUG] Graph not available")
+            _debug("Graph not available")
             return False
 
         query_lower = query.lower()
 
         # Check for author-related patterns
-        author_patterns = ["written", "wrote", "author", "papers by", "paper by", "works by",
-                          "collaborated", "collaborate", "co-author", "coauthor", "co-authored",
-                          "topics by", "write about", "research by", "what does", "publication",
-                          "did", "together", "joint"]
-        for pattern in author_patterns:
+        for pattern in GRAPH_AUTHOR_PATTERNS:
             if pattern in query_lower:
-                print(f"   [DEBUG] Found '{pattern}' in query")
+                _debug(f"Found '{pattern}' in query")
                 return True
 
         # Check for quoted author names (strong signal for graph query)
-        import re
-        if re.search(r"['\"][^'\"]+['\"]", query):
-            print(f"   [DEBUG] Found quoted names in query - using graph search")
+        if _QUOTED_RE.search(query):
+            _debug("Found quoted names in query - using graph search")
             return True
 
         # Check for keyword-related queries
-        if any(kw in query_lower for kw in ["keyword", "topic", "about", "related to", "papers on", "paper on", "research on"]):
-            print(f"   [DEBUG] Found keyword/topic pattern in query")
+        if any(kw in query_lower for kw in GRAPH_TOPIC_PATTERNS):
+            _debug("Found keyword/topic pattern in query")
             return True
 
-        print(f"   [DEBUG] No graph patterns matched in: {query_lower}")
+        _debug(f"No graph patterns matched in: {query_lower}")
         return False
 
     def semantic_search(self, query: str, max_results: int = 10, threshold: float = 0.35):
@@ -221,20 +552,20 @@ Cypher Query:"""
         Semantic search via embeddings.
         Returns all papers with similarity >= threshold, up to max_results.
         """
-        q_emb = self.vector_model.encode(query, normalize_embeddings=True).tolist()
+        q_emb = encode_query(query).tolist()
 
         # Fetch more results initially, then filter by threshold
         results = self.collection.query(
             query_embeddings=[q_emb],
             n_results=max_results,
-            include=["metadatas", "distances", "documents"]
+            include=["metadatas", "distances"]
         )
 
-        distances = results["distances"][0]
-        similarities = [1 - d for d in distances]
+        # Cosine distance -> similarity for all hits at once
+        similarities = 1.0 - np.asarray(results["distances"][0], dtype=np.float64)
 
         # Filter results by threshold
-        filtered_indices = [i for i, sim in enumerate(similarities) if sim >= threshold]
+        filtered_indices = np.flatnonzero(similarities >= threshold).tolist()
 
         if not filtered_indices:
             return None, None, 0
@@ -242,11 +573,10 @@ Cypher Query:"""
         # Build filtered results
         filtered_results = {
             "ids": [[results["ids"][0][i] for i in filtered_indices]],
-            "documents": [[results["documents"][0][i] for i in filtered_indices]],
             "metadatas": [[results["metadatas"][0][i] for i in filtered_indices]],
             "distances": [[results["distances"][0][i] for i in filtered_indices]]
         }
-        filtered_similarities = [similarities[i] for i in filtered_indices]
+        filtered_similarities = similarities[filtered_indices].tolist()
 
         return filtered_results, filtered_similarities, filtered_similarities[0]
 
@@ -295,124 +625,68 @@ Category:"""
             intent_result = self.classify_intent(query)
             intent = intent_result["intent"]
 
-            # Extract author name more intelligently
-            def extract_author_name(text):
-                """Extract author name from query - case insensitive"""
-                import re
-
-                # Common words that are NOT names
-                common_words = {'which', 'who', 'what', 'paper', 'papers', 'author', 'authors',
-                               'written', 'wrote', 'write', 'the', 'a', 'an', 'is', 'are', 'was', 'were',
-                               'find', 'show', 'list', 'all', 'about', 'on', 'in', 'by', 'from', 'with',
-                               'topics', 'topic', 'does', 'did', 'do', 'research', 'collaborate',
-                               'collaborated', 'work', 'worked', 'keywords', 'keyword'}
-
-                # Pattern 1: "by/from/of/with [Name]" - name after preposition
-                match = re.search(r'\b(?:by|from|of|with)\s+([A-Z][a-zA-ZäöüßÄÖÜ]*)', text)
-                if match:
-                    name = match.group(1).strip("?,.")
-                    if name.lower() not in common_words:
-                        return name
-
-                # Pattern 2: "[Name] write/research/collaborate" - name before verb
-                match = re.search(r'does\s+([A-Z][a-zA-ZäöüßÄÖÜ]*)\s+(?:write|research|work|study)', text)
-                if match:
-                    name = match.group(1).strip("?,.")
-                    if name.lower() not in common_words:
-                        return name
-
-                # Pattern 3: Find capitalized word that's not a common word
-                words = text.split()
-                for word in words:
-                    clean_word = word.strip("?,.")
-                    # Must start with uppercase and not be a common word
-                    if clean_word and len(clean_word) > 1 and clean_word[0].isupper():
-                        if clean_word.lower() not in common_words:
-                            return clean_word
-
-                return None
-
-            def extract_multiple_authors(text):
-                """Extract multiple author names from query, especially quoted names"""
-                import re
-                authors = []
-
-                # Pattern 1: Names in single or double quotes like 'Ahmadi, Leila' or "Bilal, Muhammad"
-                quoted_names = re.findall(r"['\"]([^'\"]+)['\"]", text)
-                for name in quoted_names:
-                    name = name.strip()
-                    if name and len(name) > 2:
-                        authors.append(name)
-
-                # Pattern 2: Names in format "Last, First" without quotes
-                if not authors:
-                    name_pattern = re.findall(r'\b([A-Z][a-zA-Z]+,\s*[A-Z][a-zA-Z]+)\b', text)
-                    authors.extend(name_pattern)
-
-                return authors
-
             # Route based on LLM intent classification
             # Pattern 1: Papers by author
             if intent == "PAPERS_BY_AUTHOR":
-                author_name = extract_author_name(query)
+                author_name = _extract_author_name(query)
 
                 if author_name:
-                    # Case-insensitive search using toLower()
+                    # Case-insensitive search on the lower-cased name_lc
+                    # (TEXT-indexed); the last-name fallback is sent in the
+                    # same round trip
                     search_name = author_name.lower()
-                    cypher = f"""
+                    last_name = author_name.split()[-1].lower()
+                    cypher = """
                     MATCH (a:Author)-[:AUTHORED]->(p:Paper)
-                    WHERE toLower(a.name) CONTAINS '{search_name}'
-                    RETURN a.name as author, p.title as title, p.doi as doi
+                    WHERE a.name_lc CONTAINS $name
+                    RETURN 'full' as match_type, a.name as author, p.title as title, p.doi as doi
                     LIMIT 10
                     """
-                    results = self._run_cypher(cypher)
+                    if last_name != search_name:
+                        cypher += """UNION ALL
+                    MATCH (a:Author)-[:AUTHORED]->(p:Paper)
+                    WHERE a.name_lc CONTAINS $last_name
+                    RETURN 'last' as match_type, a.name as author, p.title as title, p.doi as doi
+                    LIMIT 10
+                    """
+                    rows = self._run_cypher(cypher, {"name": search_name, "last_name": last_name})
+
+                    # Prefer full-name matches, then try last name only
+                    results = [r for r in rows if r["match_type"] == "full"]
+                    matched = f"matching '{author_name}'"
+                    if not results:
+                        results = [r for r in rows if r["match_type"] == "last"]
+                        matched = f"with last name '{last_name}'"
 
                     if results:
-                        result_text = f"Found {len(results)} paper(s) by authors matching '{author_name}':\n"
+                        result_text = f"Found {len(results)} paper(s) by authors {matched}:\n"
                         dois = []
                         for r in results:
                             result_text += f"\n• '{r['title']}' by {r['author']}"
                             if r.get('doi'):
                                 dois.append(r['doi'])
                         return {"success": True, "cypher": cypher, "result": result_text, "dois": dois}
-                    else:
-                        # Try last name only
-                        last_name = author_name.split()[-1].lower()
-                        cypher = f"""
-                        MATCH (a:Author)-[:AUTHORED]->(p:Paper)
-                        WHERE toLower(a.name) CONTAINS '{last_name}'
-                        RETURN a.name as author, p.title as title, p.doi as doi
-                        LIMIT 10
-                        """
-                        results = self._run_cypher(cypher)
-
-                        if results:
-                            result_text = f"Found {len(results)} paper(s) by authors with last name '{last_name}':\n"
-                            dois = []
-                            for r in results:
-                                result_text += f"\n• '{r['title']}' by {r['author']}"
-                                if r.get('doi'):
-                                    dois.append(r['doi'])
-                            return {"success": True, "cypher": cypher, "result": result_text, "dois": dois}
 
             # Pattern 2: Collaboration queries (single or multiple authors)
             if intent == "COLLABORATIONS":
                 # First try to extract multiple authors from quotes
-                authors = extract_multiple_authors(query)
-                print(f"   [DEBUG] Extracted authors: {authors}")
+                authors = _extract_multiple_authors(query)
+                _debug(f"Extracted authors: {authors}")
 
                 if len(authors) >= 2:
                     # Multiple authors specified - find papers they co-authored together
                     # Build dynamic Cypher query for N authors
                     match_clauses = []
                     where_clauses = []
+                    params = {}
                     for i, author in enumerate(authors):
                         match_clauses.append(f"(a{i}:Author)-[:AUTHORED]->(p)")
                         # Use CONTAINS for flexible matching (handles "Last, First" format)
                         author_lower = author.lower()
                         # Try matching by last name (first part before comma) for better accuracy
                         last_name = author.split(',')[0].strip().lower() if ',' in author else author.lower()
-                        where_clauses.append(f"toLower(a{i}.name) CONTAINS '{last_name}'")
+                        where_clauses.append(f"a{i}.name_lc CONTAINS $name{i}")
+                        params[f"name{i}"] = last_name
 
                     cypher = f"""
                     MATCH (p:Paper)
@@ -421,8 +695,8 @@ Category:"""
                     RETURN p.title as title, p.doi as doi, [{', '.join([f'a{i}.name' for i in range(len(authors))])}] as authors
                     LIMIT 10
                     """
-                    print(f"   [DEBUG] Multi-author Cypher: {cypher}")
-                    results = self._run_cypher(cypher)
+                    _debug(f"Multi-author Cypher: {cypher}")
+                    results = self._run_cypher(cypher, params)
 
                     if results:
                         result_text = f"Found {len(results)} publication(s) co-authored by {' and '.join(authors)}:\n"
@@ -442,19 +716,19 @@ Category:"""
 
                 else:
                     # Single author - find all their collaborators
-                    author_name = extract_author_name(query) or (authors[0] if authors else None)
+                    author_name = _extract_author_name(query) or (authors[0] if authors else None)
 
                     if author_name:
                         search_name = author_name.lower()
                         last_name = search_name.split(',')[0].strip() if ',' in search_name else search_name
-                        cypher = f"""
+                        cypher = """
                         MATCH (a1:Author)-[:AUTHORED]->(p:Paper)<-[:AUTHORED]-(a2:Author)
-                        WHERE toLower(a1.name) CONTAINS '{last_name}'
+                        WHERE a1.name_lc CONTAINS $name
                         AND a1 <> a2
                         RETURN DISTINCT a2.name as collaborator, p.title as paper, p.doi as doi
                         LIMIT 10
                         """
-                        results = self._run_cypher(cypher)
+                        results = self._run_cypher(cypher, {"name": last_name})
 
                         if results:
                             result_text = f"Authors who collaborated with {author_name}:\n"
@@ -505,7 +779,6 @@ Category:"""
             # Pattern 5: Papers by keyword/topic
             if intent == "PAPERS_BY_TOPIC":
                 # Extract the topic/keyword from query
-                import re
                 topic_match = re.search(r'(?:about|on|topic|keyword)[:\s]+["\']?([^"\'?,]+)["\']?', query_lower)
                 if topic_match:
                     topic = topic_match.group(1).strip()
@@ -515,7 +788,7 @@ Category:"""
                     topic = words[-1] if words else None
 
                 if topic:
-                    cypher = f"""
+                    cypher = """
                     MATCH (p:Paper)-[:HAS_KEYWORD]->(k:Keyword)
                     WHERE toLower(k.name) CONTAINS toLower($topic)
                     RETURN DISTINCT p.title as title, p.doi as doi, collect(k.name) as keywords
@@ -535,18 +808,18 @@ Category:"""
 
             # Pattern 6: Topics/keywords by specific author
             if intent == "TOPICS_BY_AUTHOR":
-                author_name = extract_author_name(query)
+                author_name = _extract_author_name(query)
                 if author_name:
                     search_name = author_name.lower()
-                    cypher = f"""
+                    cypher = """
                     MATCH (a:Author)-[:AUTHORED]->(p:Paper)-[:HAS_KEYWORD]->(k:Keyword)
-                    WHERE toLower(a.name) CONTAINS '{search_name}'
+                    WHERE a.name_lc CONTAINS $name
                     WITH a.name as author, k.name as keyword, k.type as type, count(p) as paper_count, collect(DISTINCT p.title) as papers
                     RETURN author, keyword, type, paper_count, papers
                     ORDER BY paper_count DESC
                     LIMIT 20
                     """
-                    results = self._run_cypher(cypher)
+                    results = self._run_cypher(cypher, {"name": search_name})
 
                     if results:
                         # Group by author
@@ -566,13 +839,13 @@ Category:"""
                                 result_text += f"  • {kw}\n"
 
                         # Also get DOIs for sources
-                        doi_cypher = f"""
+                        doi_cypher = """
                         MATCH (a:Author)-[:AUTHORED]->(p:Paper)
-                        WHERE toLower(a.name) CONTAINS '{search_name}'
+                        WHERE a.name_lc CONTAINS $name
                         RETURN p.doi as doi
                         LIMIT 10
                         """
-                        doi_results = self._run_cypher(doi_cypher)
+                        doi_results = self._run_cypher(doi_cypher, {"name": search_name})
                         dois = [r['doi'] for r in doi_results if r.get('doi')]
 
                         return {"success": True, "cypher": cypher, "result": result_text, "dois": dois}
@@ -750,11 +1023,11 @@ Category:"""
                 "transparency": transparency
             }
 
-        print(f"[OK] Found {len(vector_results['documents'][0])} papers (score: {best_score:.3f})")
+        print(f"[OK] Found {len(vector_results['metadatas'][0])} papers (score: {best_score:.3f})")
 
         # Extract context with numbered citations
-        docs = vector_results["documents"][0]
         metas = vector_results["metadatas"][0]
+        docs = [document_text(meta) for meta in metas]
         semantic_context = "\n\n".join([
             f"[{i+1}] {metas[i].get('title', 'Unknown')} ({metas[i].get('authors', 'Unknown').split(';')[0].split(',')[0]}, {metas[i].get('date', '')[:4]}): {doc}"
             for i, doc in enumerate(docs)
@@ -771,7 +1044,7 @@ Category:"""
             graph_response = self.graph_search(query)
             transparency["timing"]["graph_search"] = round(time_module.time() - step_start, 2)
 
-            print(f"   Graph response success: {graph_response.get('success')}")  # DEBUG
+            _debug(f"Graph response success: {graph_response.get('success')}")
 
             if graph_response["success"]:
                 graph_context = graph_response["result"]
@@ -784,14 +1057,13 @@ Category:"""
                     "cypher": cypher_query
                 })
                 print(f"[OK] Graph query successful")
-                print(f"   Result preview: {graph_context[:100]}...")  # DEBUG
+                _debug(f"Result preview: {graph_context[:100]}...")
 
                 # Fetch metadata for papers found by graph search
                 graph_dois = graph_response.get("dois", [])
                 if graph_dois:
                     try:
                         # Check if query has both author AND topic (e.g., "papers about AI by Smith")
-                        import re
                         topic_match = re.search(r'(?:about|on|regarding)\s+([^by]+?)(?:\s+by|\s*$)', query, re.IGNORECASE)
                         has_topic = topic_match is not None
 
@@ -801,7 +1073,7 @@ Category:"""
                             print(f"   Hybrid query detected: ranking by topic '{topic}'")
 
                             # Get embeddings for the topic and graph papers
-                            topic_emb = self.vector_model.encode(topic, normalize_embeddings=True)
+                            topic_emb = encode_query(topic)
 
                             graph_results = self.collection.get(
                                 ids=graph_dois,
@@ -809,22 +1081,18 @@ Category:"""
                             )
 
                             if graph_results and graph_results.get("metadatas"):
-                                # Calculate similarity to topic for each paper
-                                import numpy as np
-                                embeddings = graph_results.get("embeddings", [])
-                                scored_papers = []
-
-                                for i, meta in enumerate(graph_results["metadatas"]):
-                                    if embeddings and i < len(embeddings):
-                                        sim = float(np.dot(topic_emb, embeddings[i]))
-                                    else:
-                                        sim = 0.5  # Default if no embedding
-                                    scored_papers.append((meta, sim))
+                                # Similarity to topic for every paper in one mat-vec
+                                graph_metas = graph_results["metadatas"]
+                                embeddings = graph_results.get("embeddings")
+                                if embeddings is not None and len(embeddings) == len(graph_metas):
+                                    sims = np.asarray(embeddings, dtype=np.float32) @ np.asarray(topic_emb, dtype=np.float32)
+                                else:
+                                    sims = np.full(len(graph_metas), 0.5, dtype=np.float32)  # Default if no embedding
 
                                 # Sort by topic relevance
-                                scored_papers.sort(key=lambda x: x[1], reverse=True)
-                                graph_sources = [p[0] for p in scored_papers]
-                                graph_similarities = [p[1] for p in scored_papers]
+                                order = np.argsort(-sims, kind="stable")
+                                graph_sources = [graph_metas[i] for i in order]
+                                graph_similarities = sims[order].tolist()
                                 print(f"   Ranked {len(graph_sources)} papers by topic relevance")
                         else:
                             # Pure author query - just get metadata
@@ -910,6 +1178,7 @@ Before answering, ask yourself: "Do these sources actually talk about {query.spl
 
 ANSWER:"""
 
+        llm_failed = False
         try:
             answer = self.llm.invoke(prompt)
             transparency["timing"]["llm_generation"] = round(time_module.time() - step_start, 2)
@@ -923,6 +1192,7 @@ ANSWER:"""
         except Exception as e:
             print(f"[WARN] LLM timeout or error: {e}")
             answer = "Answer generation timed out. Please try a simpler question or use a faster model."
+            llm_failed = True
             transparency["steps"].append({
                 "name": "LLM Generation",
                 "description": "LLM answer generation failed",
@@ -954,5 +1224,6 @@ ANSWER:"""
             "best_score": final_score,
             "graph_used": graph_used,
             "cypher_query": cypher_query,
-            "transparency": transparency
+            "transparency": transparency,
+            "error": llm_failed  # fallback answer: not worth caching
         }
\ No newline at end of file
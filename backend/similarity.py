@@ -0,0 +1,253 @@
+"""
+Similarity helpers - vectorized pairwise cosine similarity over embeddings
+"""
+
+import os
+import json
+import tempfile
+import numpy as np
+
+# Try to import numba for the JIT top-K kernel, fall back to tiled numpy
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# Neighbours kept per row before the per-paper cap is applied (initial
+# oversampling; top_similar_pairs widens rows until the result is exact).
+CANDIDATES_PER_PAPER = 2
+
+# Rows per block in the numpy path (bounds the similarity tile to BLOCK x N)
+BLOCK_ROWS = 1024
+
+# Top-K backend: "numpy" (blocked BLAS matmul, default) or "numba" (JIT
+# kernel, never holds more than N x K scores). On a 3000 x 384 corpus the
+# numpy path measured ~0.1s vs ~0.5s for numba, so numba is opt-in.
+SIMILARITY_BACKEND = os.getenv("SIMILARITY_BACKEND", "numpy").lower()
+
+# Snapshot precision: "fp32" (default) or "int8". int8 stores each row as
+# round(E / s) with a per-row scale s = max|row| / 127, a quarter of the bytes
+# to map and page in. numpy has no BLAS path for integer GEMM (int32 matmul
+# measured ~40x slower than fp32 on 1024 x 3000 x 384), so int8 rows are
+# dequantized to float32 on load and the matmul stays on BLAS.
+SIMILARITY_PRECISION = os.getenv("SIMILARITY_PRECISION", "fp32").lower()
+
+
+# Embedding snapshot written next to the Chroma store after each upload
+SNAPSHOT_MATRIX = "embeddings.npy"
+SNAPSHOT_SIDECAR = "embeddings.json"
+SNAPSHOT_SCALES = "embeddings_scales.npy"
+
+
+def quantize_int8(E: np.ndarray):
+    """
+    Symmetric per-row int8 quantization. Returns (Q, scales) with
+    E ~= Q * scales[:, None]; each row uses the full [-127, 127] range.
+    """
+    scales = np.abs(E).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    Q = np.clip(np.round(E / scales[:, None]), -127, 127).astype(np.int8)
+    return Q, scales.astype(np.float32)
+
+
+def dequantize_int8(Q: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Inverse of quantize_int8, as a float32 matrix."""
+    return Q.astype(np.float32) * scales[:, None]
+
+
+def _replace_file(path: str, write) -> None:
+    """
+    Write a file through a temp file in the same directory and os.replace it
+    in. A reader still holding a memory map of the old file keeps its old
+    contents instead of seeing the file rewritten (or truncated) under it.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_embedding_snapshot(db_path: str, ids, titles, embeddings) -> None:
+    """
+    Persist the corpus embeddings as a packed float32 .npy matrix plus a
+    small JSON sidecar with the matching ids/titles (int8 when
+    SIMILARITY_PRECISION=int8). Every file is replaced atomically.
+    """
+    E = np.ascontiguousarray(embeddings, dtype=np.float32)
+    scales_path = os.path.join(db_path, SNAPSHOT_SCALES)
+    if SIMILARITY_PRECISION == "int8":
+        E, scales = quantize_int8(E)
+        _replace_file(scales_path, lambda f: np.save(f, scales))
+    elif os.path.exists(scales_path):
+        os.remove(scales_path)
+    _replace_file(os.path.join(db_path, SNAPSHOT_MATRIX), lambda f: np.save(f, E))
+    sidecar = json.dumps({"ids": list(ids), "titles": list(titles)})
+    _replace_file(os.path.join(db_path, SNAPSHOT_SIDECAR), lambda f: f.write(sidecar.encode("utf-8")))
+
+
+def load_embedding_snapshot(db_path: str):
+    """
+    Load a snapshot written by save_embedding_snapshot. The matrix is
+    memory-mapped, so loading is O(1) and pages come from the OS cache
+    (int8 snapshots are dequantized to float32).
+    Returns (E, ids, titles), or None if no snapshot exists.
+    """
+    matrix_path = os.path.join(db_path, SNAPSHOT_MATRIX)
+    sidecar_path = os.path.join(db_path, SNAPSHOT_SIDECAR)
+    if not (os.path.exists(matrix_path) and os.path.exists(sidecar_path)):
+        return None
+    E = np.load(matrix_path, mmap_mode="r")
+    if E.dtype == np.int8:
+        E = dequantize_int8(E, np.load(os.path.join(db_path, SNAPSHOT_SCALES)))
+    with open(sidecar_path, encoding="utf-8") as f:
+        sidecar = json.load(f)
+    return E, sidecar["ids"], sidecar["titles"]
+
+
+def _empty_pairs():
+    return (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.float32))
+
+
+def _topk_neighbours_numpy(E: np.ndarray, k: int, rows=None):
+    """
+    Top-k neighbours of the given rows (default: every row) via blocked
+    matmul + np.argpartition.
+    """
+    rows = np.arange(len(E)) if rows is None else rows
+    n = len(rows)
+    cols = np.empty((n, k), dtype=np.int64)
+    sims = np.empty((n, k), dtype=np.float32)
+    for start in range(0, n, BLOCK_ROWS):
+        stop = min(start + BLOCK_ROWS, n)
+        block = rows[start:stop]
+        S = E[block] @ E.T
+        # Exclude self-matches
+        S[np.arange(stop - start), block] = -np.inf
+        block_cols = np.argpartition(-S, k - 1, axis=1)[:, :k]
+        cols[start:stop] = block_cols
+        sims[start:stop] = np.take_along_axis(S, block_cols, axis=1)
+    return cols, sims
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _topk_neighbours_numba(E, k):
+        """Top-k neighbours per row; one row per thread, O(N*k) memory."""
+        n, d = E.shape
+        cols = np.full((n, k), -1, dtype=np.int64)
+        sims = np.full((n, k), -np.inf, dtype=np.float32)
+        for i in prange(n):
+            for j in range(n):
+                if j == i:
+                    continue
+                s = np.float32(0.0)
+                for t in range(d):
+                    s += E[i, t] * E[j, t]
+                if s > sims[i, k - 1]:
+                    # Insert into the row's descending top-k list
+                    pos = k - 1
+                    while pos > 0 and sims[i, pos - 1] < s:
+                        sims[i, pos] = sims[i, pos - 1]
+                        cols[i, pos] = cols[i, pos - 1]
+                        pos -= 1
+                    sims[i, pos] = s
+                    cols[i, pos] = j
+        return cols, sims
+
+
+def _topk_neighbours(E: np.ndarray, k: int):
+    if SIMILARITY_BACKEND == "numba" and HAS_NUMBA:
+        return _topk_neighbours_numba(E, k)
+    return _topk_neighbours_numpy(E, k)
+
+
+def _greedy_cap(i_idx, j_idx, sims, n: int, max_per_paper: int):
+    """
+    Strongest pairs first, keep a pair while both papers are under the cap.
+    Returns the kept positions and, per paper, the similarity of the pair
+    that filled it (-inf if it never reached the cap).
+    """
+    order = np.argsort(-sims, kind="stable")
+    counts = np.zeros(n, dtype=np.int64)
+    full_at = np.full(n, -np.inf, dtype=np.float32)
+    keep = []
+    for idx in order:
+        i, j = i_idx[idx], j_idx[idx]
+        if counts[i] < max_per_paper and counts[j] < max_per_paper:
+            keep.append(idx)
+            counts[i] += 1
+            counts[j] += 1
+            if counts[i] == max_per_paper:
+                full_at[i] = sims[idx]
+            if counts[j] == max_per_paper:
+                full_at[j] = sims[idx]
+    return np.asarray(keep, dtype=np.int64), full_at
+
+
+def top_similar_pairs(embeddings, threshold: float, max_per_paper: int):
+    """
+    Find paper pairs with cosine similarity >= threshold, keeping at most
+    max_per_paper connections per paper (strongest pairs first).
+
+    Embeddings must already be L2-normalized, so cosine similarity is a
+    plain dot product. Candidates are each paper's top-k neighbours,
+    computed block by block (or by the Numba kernel), so the full N x N
+    matrix is never materialized. k starts at
+    CANDIDATES_PER_PAPER * max_per_paper; papers that could still be
+    missing a pair the greedy pass would keep get their k doubled (numpy,
+    those rows only) until none are left, so the result matches a greedy
+    pass over all pairs (up to the order of equal similarities).
+    Returns (source_idx, target_idx, similarities) as numpy arrays with
+    source_idx < target_idx.
+    """
+    E = np.ascontiguousarray(embeddings, dtype=np.float32)
+    n = len(E)
+    if n < 2 or max_per_paper <= 0:
+        return _empty_pairs()
+
+    k = min(CANDIDATES_PER_PAPER * max_per_paper, n - 1)
+    cols, sims = _topk_neighbours(E, k)
+    rows = np.repeat(np.arange(n), k)
+    # Weakest candidate per paper (-inf once all n - 1 neighbours are in)
+    kth = sims.min(axis=1) if k < n - 1 else np.full(n, -np.inf, dtype=np.float32)
+    mask = sims.ravel() >= threshold
+    rows, cols, sims = rows[mask], cols.ravel()[mask], sims.ravel()[mask]
+
+    while True:
+        if len(sims) == 0:
+            return _empty_pairs()
+
+        # Symmetrize: (i, j) and (j, i) become one pair with i < j
+        i_idx = np.minimum(rows, cols)
+        j_idx = np.maximum(rows, cols)
+        _, first = np.unique(i_idx * n + j_idx, return_index=True)
+        i_idx, j_idx, pair_sims = i_idx[first], j_idx[first], sims[first]
+
+        keep, full_at = _greedy_cap(i_idx, j_idx, pair_sims, n, max_per_paper)
+
+        # A pair missing from both papers' candidates has similarity <= each
+        # paper's weakest candidate. It cannot change the result if either
+        # paper was already full at that point, so only pairs between two
+        # "unsafe" papers can be missing: widen those papers and rerun.
+        unsafe = (kth >= threshold) & (full_at < kth)
+        if np.count_nonzero(unsafe) < 2:
+            break
+        k = min(2 * k, n - 1)
+        widened = np.flatnonzero(unsafe)
+        new_cols, new_sims = _topk_neighbours_numpy(E, k, widened)
+        kth[widened] = new_sims.min(axis=1) if k < n - 1 else -np.inf
+        new_rows = np.repeat(widened, k)
+        new_mask = new_sims.ravel() >= threshold
+        old = ~unsafe[rows]
+        rows = np.concatenate([rows[old], new_rows[new_mask]])
+        cols = np.concatenate([cols[old], new_cols.ravel()[new_mask]])
+        sims = np.concatenate([sims[old], new_sims.ravel()[new_mask]])
+
+    return i_idx[keep], j_idx[keep], pair_sims[keep]
@@ -394,6 +394,26 @@ export default function HybridRAGInterface() {
     setFileInputKey(k => k + 1);
   };
 
+  // ========== UPLOAD JOB POLLING ==========
+  const waitForUploadJob = async (jobId) => {
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, 1500));
+
+      const statusResponse = await fetch(`${API_BASE_URL}/api/status?job_id=${jobId}`);
+      const statusResult = await statusResponse.json();
+
+      if (!statusResponse.ok) {
+        throw new Error(statusResult.error || 'Upload failed');
+      }
+
+      const job = statusResult.job;
+      if (job.status === 'ready') return job.result;
+      if (job.status === 'error') throw new Error(job.error || 'Upload failed');
+
+      setUploadProgress(`${job.step}...`);
+    }
+  };
+
   // ========== UPLOAD HANDLER ==========
   const handleFileUpload = async (e) => {
     const uploadedFile = e.target.files[0];
@@ -412,18 +432,26 @@ export default function HybridRAGInterface() {
       const formData = new FormData();
       formData.append('file', uploadedFile);
 
-      const uploadResponse = await fetch(`${API_BASE_URL}/api/upload`, {
+      // Starting from an empty workspace replaces the backend corpus;
+      // otherwise the server only indexes papers it has not seen yet
+      const replace = papers.length === 0;
+      const uploadResponse = await fetch(`${API_BASE_URL}/api/upload?replace=${replace}`, {
         method: 'POST',
         body: formData
       });
 
-      const uploadResult = await uploadResponse.json();
+      let uploadResult = await uploadResponse.json();
 
       if (!uploadResponse.ok) {
         // Show error from backend
         throw new Error(uploadResult.error || 'Upload failed');
       }
 
+      // Processing runs as a background job - poll until it finishes
+      if (uploadResult.job_id) {
+        uploadResult = await waitForUploadJob(uploadResult.job_id);
+      }
+
       if (!uploadResult.papers || uploadResult.papers.length === 0) {
         throw new Error('No valid papers found in file. Please check the file format.');
       }
@@ -0,0 +1,33 @@
+import pytest
+
+from backend import etl
+
+HEADER = "title,authors,abstract,date,doi,journal_name\n"
+
+
+@pytest.mark.parametrize("use_pyarrow", [True, False])
+def test_short_row_is_kept_with_empty_trailing_fields(tmp_path, monkeypatch, use_pyarrow):
+    # Exports may omit empty trailing columns; such rows must still load
+    if use_pyarrow and not etl.HAS_PYARROW:
+        pytest.skip("pyarrow not installed")
+    monkeypatch.setattr(etl, "HAS_PYARROW", use_pyarrow)
+    path = tmp_path / "short.csv"
+    path.write_text(HEADER + "T1,A,B,2020,d1,J\nT2,A,B,2021,d2\nT3,A,B,2022,d3,J\n", encoding="utf-8")
+
+    df = etl.load_and_parse_standard_data(str(path))
+
+    assert list(df["doi"]) == ["d1", "d2", "d3"]
+    assert list(df["journal_name"]) == ["J", "", "J"]
+
+
+@pytest.mark.parametrize("use_pyarrow", [True, False])
+def test_row_with_extra_fields_is_skipped(tmp_path, monkeypatch, use_pyarrow):
+    if use_pyarrow and not etl.HAS_PYARROW:
+        pytest.skip("pyarrow not installed")
+    monkeypatch.setattr(etl, "HAS_PYARROW", use_pyarrow)
+    path = tmp_path / "long.csv"
+    path.write_text(HEADER + "T1,A,B,2020,d1,J\nT2,A,B,2021,d2,J,EXTRA\nT3,A,B,2022,d3,J\n", encoding="utf-8")
+
+    df = etl.load_and_parse_standard_data(str(path))
+
+    assert list(df["doi"]) == ["d1", "d3"]
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from backend import similarity
+
+
+def _greedy_reference(E, threshold, max_per_paper):
+    """The original all-pairs pass: every pair >= threshold, strongest first, capped per paper."""
+    pairs = []
+    for i in range(len(E)):
+        for j in range(i + 1, len(E)):
+            sim = float(np.dot(E[i], E[j]))
+            if sim >= threshold:
+                pairs.append((sim, i, j))
+    pairs.sort(key=lambda p: p[0], reverse=True)
+    counts = {}
+    kept = set()
+    for sim, i, j in pairs:
+        if counts.get(i, 0) < max_per_paper and counts.get(j, 0) < max_per_paper:
+            kept.add((i, j))
+            counts[i] = counts.get(i, 0) + 1
+            counts[j] = counts.get(j, 0) + 1
+    return kept
+
+
+def _clustered_unit_vectors(n, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(8, 32))
+    E = centers[rng.integers(0, len(centers), n)] + rng.normal(size=(n, 32))
+    return (E / np.linalg.norm(E, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.mark.parametrize("threshold", [0.3, 0.5])
+@pytest.mark.parametrize("max_per_paper", [1, 3])
+def test_top_similar_pairs_matches_all_pairs_greedy(threshold, max_per_paper):
+    E = _clustered_unit_vectors(300)
+
+    source, target, sims = similarity.top_similar_pairs(E, threshold, max_per_paper)
+
+    assert set(zip(source.tolist(), target.tolist())) == _greedy_reference(E, threshold, max_per_paper)
+    assert np.all(source < target)
+    assert np.all(sims >= threshold)